@@ -0,0 +1,323 @@
+"""
+Batch anomaly detection over the bid history. Run: python -m scripts.detect_anomalies
+
+Flags per tender:
+- under_budget:      most bids cluster just under Tender.budget
+- identical_amounts: bids from different companies with near-identical amounts
+- bid_rotation:      the same set of bidders meets on several tenders and the
+                     wins rotate between them
+
+Bids are streamed from the database in chunks and analysed a batch of tenders
+at a time with vectorized NumPy operations. Incremental runs (the default)
+only re-analyse tenders that received bids since the last run or whose status
+changed since then; the watermark lives in SystemConfig.
+
+run_detection also runs inside the API process (the bid_status_changed job),
+so building the columns and the NumPy analysis run in a worker thread and
+only the queries run on the event loop.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import anyio
+import numpy as np
+from sqlalchemy import delete, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Bid, BidAnomaly, SystemConfig, Tender, TenderBidProfile, User
+
+WATERMARK_KEY = "anomaly_watermark"
+STREAM_CHUNK = 10_000
+TENDER_BATCH = 500
+
+UNDER_BUDGET_BAND = 0.03  # bids within 3% below budget
+UNDER_BUDGET_MIN_BIDS = 3
+UNDER_BUDGET_MIN_SHARE = 0.6
+IDENTICAL_TOLERANCE = 0.001  # 0.1% relative difference
+ROTATION_MIN_TENDERS = 3
+ROTATION_MAX_WIN_SHARE = 0.6
+
+PER_TENDER_KINDS = ("under_budget", "identical_amounts")
+ROTATION_KIND = "bid_rotation"
+
+
+@dataclass
+class RunStats:
+    tenders_analysed: int = 0
+    bids_analysed: int = 0
+    flagged: dict[str, int] = field(default_factory=dict)  # totals after the run
+    last_bid_id: int = 0
+
+
+@dataclass
+class BidBatch:
+    """Bids of a batch of tenders as columns, sorted by tender then amount."""
+    tender: np.ndarray
+    bidder: np.ndarray
+    amount: np.ndarray
+    budget: np.ndarray
+    company: np.ndarray
+    accepted: np.ndarray
+
+
+async def load_watermark(db: AsyncSession) -> dict:
+    result = await db.execute(select(SystemConfig).where(SystemConfig.key == WATERMARK_KEY))
+    config = result.scalar_one_or_none()
+    if not config or not config.value:
+        return {}
+    return json.loads(config.value)
+
+
+async def save_watermark(db: AsyncSession, last_bid_id: int, run_started: datetime):
+    value = json.dumps({"last_bid_id": last_bid_id, "last_run": run_started.isoformat()})
+    result = await db.execute(select(SystemConfig).where(SystemConfig.key == WATERMARK_KEY))
+    config = result.scalar_one_or_none()
+    if config:
+        config.value = value
+    else:
+        db.add(SystemConfig(key=WATERMARK_KEY, value=value))
+    await db.flush()
+
+
+async def find_affected_tenders(db: AsyncSession, watermark: dict, max_bid_id: int) -> np.ndarray:
+    """Tender ids with bids in (last_bid_id, max_bid_id] or changed since the last run."""
+    last_bid_id = watermark.get("last_bid_id", 0)
+    chunks = []
+    stream = await db.stream(
+        select(Bid.tender_id)
+        .where(Bid.id > last_bid_id, Bid.id <= max_bid_id)
+        .execution_options(yield_per=STREAM_CHUNK)
+    )
+    async for partition in stream.partitions():
+        chunks.append(np.fromiter((row[0] for row in partition), dtype=np.int64))
+    if watermark.get("last_run"):
+        changed = await db.execute(
+            select(Tender.id).where(Tender.updated_at > datetime.fromisoformat(watermark["last_run"]))
+        )
+        chunks.append(np.fromiter(changed.scalars(), dtype=np.int64))
+    if not chunks:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(chunks))
+
+
+async def load_batch(db: AsyncSession, tender_ids: list[int], max_bid_id: int) -> BidBatch:
+    stream = await db.stream(
+        select(Bid.tender_id, Bid.bidder_id, Bid.amount, Tender.budget, User.company, Bid.status)
+        .join(Tender, Tender.id == Bid.tender_id)
+        .join(User, User.id == Bid.bidder_id)
+        .where(Bid.tender_id.in_(tender_ids), Bid.id <= max_bid_id)
+        .order_by(Bid.tender_id, Bid.amount)
+        .execution_options(yield_per=STREAM_CHUNK)
+    )
+    partitions = [partition async for partition in stream.partitions()]
+    return await anyio.to_thread.run_sync(to_batch, partitions)
+
+
+def to_batch(partitions: list) -> BidBatch:
+    columns = [[] for _ in range(6)]
+    for partition in partitions:
+        for i, values in enumerate(zip(*partition)):
+            columns[i].extend(values)
+    tender, bidder, amount, budget, company, status = columns
+
+    # Factorize companies; a bidder without a company only matches itself.
+    codes: dict[str, int] = {}
+    company_codes = np.fromiter(
+        (codes.setdefault(c, len(codes)) if c else -b for c, b in zip(company, bidder)),
+        dtype=np.int64, count=len(bidder),
+    )
+    return BidBatch(
+        tender=np.asarray(tender, dtype=np.int64),
+        bidder=np.asarray(bidder, dtype=np.int64),
+        amount=np.asarray(amount, dtype=float),
+        budget=np.asarray([b or 0.0 for b in budget], dtype=float),
+        company=company_codes,
+        accepted=np.asarray([s == "accepted" for s in status], dtype=bool),
+    )
+
+
+def detect_per_tender(batch: BidBatch) -> list[dict]:
+    """under_budget and identical_amounts flags for every tender in the batch."""
+    n = len(batch.tender)
+    if n == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, batch.tender[1:] != batch.tender[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    tender_ids = batch.tender[starts]
+    group = np.repeat(np.arange(len(starts)), counts)
+    flags = []
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(batch.budget > 0, batch.amount / batch.budget, np.nan)
+    near = (ratio >= 1 - UNDER_BUDGET_BAND) & (ratio <= 1)
+    near_share = np.add.reduceat(near.astype(float), starts) / counts
+    hit = (counts >= UNDER_BUDGET_MIN_BIDS) & (near_share >= UNDER_BUDGET_MIN_SHARE)
+    for i in np.flatnonzero(hit):
+        flags.append({
+            "tender_id": int(tender_ids[i]),
+            "kind": "under_budget",
+            "score": float(near_share[i]),
+            "details": {"bids": int(counts[i]), "near_budget": int(round(near_share[i] * counts[i]))},
+        })
+
+    # Bids are sorted by amount within a tender, so near-identical pairs are neighbours.
+    same_tender = batch.tender[1:] == batch.tender[:-1]
+    pair_max = np.maximum(batch.amount[1:], batch.amount[:-1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_diff = np.where(pair_max > 0, np.abs(np.diff(batch.amount)) / pair_max, np.inf)
+    suspicious = same_tender & (rel_diff <= IDENTICAL_TOLERANCE) & (batch.company[1:] != batch.company[:-1])
+    pairs = np.bincount(group[1:][suspicious], minlength=len(starts))
+    for i in np.flatnonzero(pairs):
+        flags.append({
+            "tender_id": int(tender_ids[i]),
+            "kind": "identical_amounts",
+            "score": float(pairs[i] / max(counts[i] - 1, 1)),
+            "details": {"bids": int(counts[i]), "pairs": int(pairs[i])},
+        })
+    return flags
+
+
+def build_profiles(batch: BidBatch) -> list[dict]:
+    """Bidder set hash and winner per tender with at least two bidders."""
+    n = len(batch.tender)
+    if n == 0:
+        return []
+    order = np.lexsort((batch.bidder, batch.tender))
+    tender, bidder = batch.tender[order], batch.bidder[order]
+    starts = np.flatnonzero(np.r_[True, tender[1:] != tender[:-1]])
+    bounds = np.r_[starts, n]
+    winners = dict(zip(batch.tender[batch.accepted].tolist(), batch.bidder[batch.accepted].tolist()))
+    profiles = []
+    for i, start in enumerate(starts):
+        bidders = np.unique(bidder[start:bounds[i + 1]])
+        if len(bidders) < 2:
+            continue
+        tender_id = int(tender[start])
+        profiles.append({
+            "tender_id": tender_id,
+            "bidder_set": hashlib.sha1(bidders.tobytes()).hexdigest(),
+            "bidders_count": len(bidders),
+            "winner_id": winners.get(tender_id),
+        })
+    return profiles
+
+
+async def detect_rotation(db: AsyncSession, bidder_sets: set[str]) -> tuple[list[int], list[dict]]:
+    """Re-check rotation for the given bidder sets. Returns (tenders checked, flags)."""
+    if not bidder_sets:
+        return [], []
+    result = await db.execute(
+        select(TenderBidProfile.tender_id, TenderBidProfile.bidder_set, TenderBidProfile.winner_id)
+        .where(TenderBidProfile.bidder_set.in_(bidder_sets))
+    )
+    return await anyio.to_thread.run_sync(rotation_flags, result.all())
+
+
+def rotation_flags(rows: list) -> tuple[list[int], list[dict]]:
+    """Rotation flags from (tender_id, bidder_set, winner_id) profile rows."""
+    if not rows:
+        return [], []
+    tender_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    set_keys, set_code = np.unique(np.array([r[1] for r in rows]), return_inverse=True)
+    winner = np.array([r[2] if r[2] is not None else -1 for r in rows], dtype=np.int64)
+
+    n_sets = len(set_keys)
+    awarded = winner >= 0
+    awarded_count = np.bincount(set_code[awarded], minlength=n_sets)
+    distinct_winners = np.zeros(n_sets, dtype=np.int64)
+    top_wins = np.zeros(n_sets, dtype=np.int64)
+    if awarded.any():
+        pairs, pair_count = np.unique(
+            np.stack([set_code[awarded], winner[awarded]], axis=1), axis=0, return_counts=True
+        )
+        distinct_winners = np.bincount(pairs[:, 0], minlength=n_sets)
+        np.maximum.at(top_wins, pairs[:, 0], pair_count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        top_share = np.where(awarded_count > 0, top_wins / awarded_count, 1.0)
+    rotating = (
+        (awarded_count >= ROTATION_MIN_TENDERS)
+        & (distinct_winners >= 2)
+        & (top_share <= ROTATION_MAX_WIN_SHARE)
+    )
+
+    flags = []
+    for i in np.flatnonzero(rotating[set_code] & awarded):
+        code = set_code[i]
+        flags.append({
+            "tender_id": int(tender_ids[i]),
+            "kind": ROTATION_KIND,
+            "score": float(1 - top_share[code]),
+            "details": {
+                "tenders": int(awarded_count[code]),
+                "distinct_winners": int(distinct_winners[code]),
+                "bidder_set": str(set_keys[code]),
+            },
+        })
+    return tender_ids.tolist(), flags
+
+
+async def replace_flags(db: AsyncSession, tender_ids: list[int], kinds, flags: list[dict]):
+    if tender_ids:
+        await db.execute(
+            delete(BidAnomaly).where(BidAnomaly.tender_id.in_(tender_ids), BidAnomaly.kind.in_(kinds))
+        )
+    now = datetime.utcnow()
+    for flag in flags:
+        db.add(BidAnomaly(
+            tender_id=flag["tender_id"],
+            kind=flag["kind"],
+            score=flag["score"],
+            details=json.dumps(flag["details"]),
+            detected_at=now,
+        ))
+    await db.flush()
+
+
+async def run_detection(session_factory, full: bool = False) -> RunStats:
+    """Analyse new bids (or all with full=True) and save flags. Commits per batch."""
+    stats = RunStats()
+    run_started = datetime.utcnow()
+    async with session_factory() as db:
+        watermark = {} if full else await load_watermark(db)
+        max_bid_id = (await db.execute(select(func.max(Bid.id)))).scalar() or 0
+        affected = await find_affected_tenders(db, watermark, max_bid_id)
+        if full:
+            await db.execute(delete(TenderBidProfile))
+            await db.execute(delete(BidAnomaly))
+            await db.commit()
+    stats.last_bid_id = max_bid_id
+
+    for offset in range(0, len(affected), TENDER_BATCH):
+        batch_ids = affected[offset:offset + TENDER_BATCH].tolist()
+        async with session_factory() as db:
+            batch = await load_batch(db, batch_ids, max_bid_id)
+            flags, profiles = await anyio.to_thread.run_sync(
+                lambda: (detect_per_tender(batch), build_profiles(batch))
+            )
+            await replace_flags(db, batch_ids, PER_TENDER_KINDS, flags)
+
+            old_sets = await db.execute(
+                select(TenderBidProfile.bidder_set).where(TenderBidProfile.tender_id.in_(batch_ids))
+            )
+            touched_sets = set(old_sets.scalars())
+            await db.execute(delete(TenderBidProfile).where(TenderBidProfile.tender_id.in_(batch_ids)))
+            for profile in profiles:
+                db.add(TenderBidProfile(**profile))
+                touched_sets.add(profile["bidder_set"])
+            await db.flush()
+
+            checked, rotation_flags = await detect_rotation(db, touched_sets)
+            await replace_flags(db, checked, (ROTATION_KIND,), rotation_flags)
+            await db.commit()
+
+        stats.tenders_analysed += len(batch_ids)
+        stats.bids_analysed += len(batch.tender)
+
+    async with session_factory() as db:
+        await save_watermark(db, max_bid_id, run_started)
+        await db.commit()
+        totals = await db.execute(select(BidAnomaly.kind, func.count()).group_by(BidAnomaly.kind))
+        stats.flagged = dict(totals.all())
+    return stats
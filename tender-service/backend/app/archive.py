@@ -0,0 +1,94 @@
+"""
+Hot/cold archival of closed tenders. Run: python -m scripts.archive_tenders
+
+Awarded and cancelled tenders not updated for ARCHIVE_AFTER_DAYS are moved,
+together with their bids, into tenders_archive / bids_archive. Each batch is a
+short transaction of its own, so writers are never blocked for long. Rows keep
+their ids, so attachments and lookups by id still resolve; ids are never
+reused by the hot tables (sqlite_autoincrement, see database.init_db).
+
+Read routes use the archive only when asked (?archived=true) or when a lookup
+by id misses the hot tables.
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cache
+from app.models import ArchivedBid, ArchivedTender, Bid, Tender, TenderStatus
+
+CLOSED_STATUSES = (TenderStatus.AWARDED.value, TenderStatus.CANCELLED.value)
+BATCH_PAUSE = 0.05  # seconds between batches, lets request transactions in
+
+TENDER_COLUMNS = [c.key for c in Tender.__table__.columns]
+BID_COLUMNS = [c.key for c in Bid.__table__.columns]
+
+
+@dataclass
+class ArchiveStats:
+    tenders: int = 0
+    bids: int = 0
+
+
+def tender_models(archived: bool):
+    """(tender model, bid model) for the hot or the archive tables."""
+    return (ArchivedTender, ArchivedBid) if archived else (Tender, Bid)
+
+
+async def find_tender(db: AsyncSession, tender_id: int):
+    """Tender by id from the hot table, falling back to the archive."""
+    result = await db.execute(select(Tender).where(Tender.id == tender_id))
+    tender = result.scalar_one_or_none()
+    if tender is None:
+        result = await db.execute(select(ArchivedTender).where(ArchivedTender.id == tender_id))
+        tender = result.scalar_one_or_none()
+    return tender
+
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> ArchiveStats:
+    # Archived rows keep their ids; tenders and bids use AUTOINCREMENT, so the
+    # hot tables never hand those ids out again.
+    result = await db.execute(
+        select(Tender.id)
+        .where(Tender.status.in_(CLOSED_STATUSES), Tender.updated_at < cutoff)
+        .order_by(Tender.id)
+        .limit(batch_size)
+    )
+    ids = list(result.scalars())
+    if not ids:
+        return ArchiveStats()
+
+    now = datetime.utcnow()
+    await db.execute(
+        insert(ArchivedTender).from_select(
+            TENDER_COLUMNS + ["archived_at"],
+            select(*[getattr(Tender, c) for c in TENDER_COLUMNS], literal(now)).where(Tender.id.in_(ids)),
+        )
+    )
+    bids = await db.execute(
+        insert(ArchivedBid).from_select(
+            BID_COLUMNS + ["archived_at"],
+            select(*[getattr(Bid, c) for c in BID_COLUMNS], literal(now)).where(Bid.tender_id.in_(ids)),
+        )
+    )
+    await db.execute(delete(Bid).where(Bid.tender_id.in_(ids)))
+    await db.execute(delete(Tender).where(Tender.id.in_(ids)))
+    await cache.invalidate(db, "tenders")
+    return ArchiveStats(tenders=len(ids), bids=bids.rowcount)
+
+
+async def archive_closed_tenders(session_factory, older_than_days: int, batch_size: int) -> ArchiveStats:
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = ArchiveStats()
+    while True:
+        async with session_factory() as db:
+            stats = await archive_batch(db, cutoff, batch_size)
+            await db.commit()
+        total.tenders += stats.tenders
+        total.bids += stats.bids
+        if stats.tenders < batch_size:
+            return total
+        await asyncio.sleep(BATCH_PAUSE)
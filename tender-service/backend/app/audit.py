@@ -0,0 +1,159 @@
+"""
+Write-behind audit log of admin actions.
+
+Routes call audit.record(db, actor, action, entity_type, entity_id, **details)
+in their transaction. The event waits in the session until the transaction
+commits, so rolled-back actions are never logged. It then moves to an
+in-memory ring buffer of AUDIT_BUFFER_SIZE events. A background task writes
+the buffer to the audit_log table in multi-row INSERTs. It flushes as soon as
+AUDIT_BATCH_SIZE events are waiting, at least every AUDIT_FLUSH_INTERVAL
+seconds, and once more on shutdown. The request itself never waits for the
+audit INSERT.
+
+If the database falls behind long enough for the buffer to fill, the oldest
+events are dropped and counted in AuditLog.dropped. Each event remembers its
+organization and is written to that organization's database; a failing
+database only holds back its own organization's events, and events of an
+organization deactivated in the meantime are dropped.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models import AuditEvent, User
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    def __init__(self, capacity: int, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._buffer: deque[dict] = deque(maxlen=capacity)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def record(
+        self,
+        db: AsyncSession,
+        actor: Optional[User],
+        action: str,
+        entity_type: str,
+        entity_id: Optional[int] = None,
+        **details,
+    ):
+        db.info.setdefault("audit_events", []).append({
+            "tenant": database.current_tenant.get(),
+            "actor_id": actor.id if actor is not None else None,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "details": json.dumps(details, default=str, ensure_ascii=False),
+            "created_at": datetime.utcnow(),
+        })
+
+    def push(self, events: list[dict]):
+        overflow = len(self._buffer) + len(events) - self._buffer.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning("Audit buffer full, dropped %d oldest events", overflow)
+        self._buffer.extend(events)
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+            self._wakeup = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Write out everything buffered so far, batch_size rows per INSERT. An
+        organization whose write fails keeps its unwritten events for the next
+        flush; the other organizations are written regardless.
+        """
+        by_tenant: dict[Optional[str], list[dict]] = {}
+        while self._buffer:
+            entry = self._buffer.popleft()
+            by_tenant.setdefault(entry["tenant"], []).append(entry)
+        unwritten = []
+        for tenant, events in by_tenant.items():
+            if tenant is not None and not database.tenant_databases.is_registered(tenant):
+                # Deactivated since: its database is gone from this process
+                self.dropped += len(events)
+                logger.warning("Dropped %d audit events of unknown organization %s", len(events), tenant)
+                continue
+            written = 0
+            try:
+                with database.use_tenant(tenant):
+                    async with database.AsyncSessionLocal() as db:
+                        while written < len(events):
+                            batch = events[written:written + self.batch_size]
+                            rows = [{k: v for k, v in e.items() if k != "tenant"} for e in batch]
+                            await db.execute(insert(AuditEvent), rows)
+                            await db.commit()
+                            written += len(batch)
+            except Exception:
+                logger.exception("Writing audit events of organization %s failed", tenant)
+                unwritten.extend(events[written:])
+        if unwritten:
+            self._requeue(unwritten)
+
+    def _requeue(self, unwritten: list[dict]):
+        """Put unwritten events back in front of newer ones, dropping the oldest if full."""
+        # extendleft() on a full deque would evict from the right, i.e. the newest events
+        events = sorted(unwritten, key=lambda e: e["created_at"]) + list(self._buffer)
+        overflow = len(events) - self._buffer.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning("Audit buffer full, dropped %d oldest events", overflow)
+            events = events[overflow:]
+        self._buffer.clear()
+        self._buffer.extend(events)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Audit flush failed, %d events buffered", len(self._buffer))
+
+
+audit = AuditLog(settings.AUDIT_BUFFER_SIZE, settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_INTERVAL)
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_committed(session: Session):
+    events = session.info.pop("audit_events", None)
+    if events:
+        audit.push(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session):
+    session.info.pop("audit_events", None)
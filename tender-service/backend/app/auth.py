@@ -7,9 +7,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.cache import cache
 from app.config import settings
-from app.database import get_db
+from app.database import current_tenant, get_db, get_read_db
 from app.models import User
 from app.schemas import UserResponse
 
@@ -32,13 +34,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    tenant = current_tenant.get()
+    if tenant is not None:
+        to_encode["org"] = tenant
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+async def authenticate(token: str, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -47,24 +49,58 @@ async def get_current_user(
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: int = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("org") != current_tenant.get():
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
-    if user is None:
+    async def load_user() -> dict | None:
+        result = await db.execute(select(User).where(User.id == int(user_id)))
+        found = result.scalar_one_or_none()
+        if found is None:
+            return None
+        return {c.key: getattr(found, c.key) for c in User.__table__.columns}
+
+    snapshot = await cache.get_or_load("users", int(user_id), load_user)
+    if snapshot is None:
         raise credentials_exception
+    # Detached copy: cached state is shared between requests, instances are not.
+    user = User(**snapshot)
+    make_transient_to_detached(user)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
-async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    return await authenticate(token, db)
+
+
+async def get_current_user_readonly(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """get_current_user for GET routes: shares the route's read-only session."""
+    return await authenticate(token, db)
+
+
+def require_admin(current_user: User) -> User:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     return current_user
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    return require_admin(current_user)
+
+
+async def get_current_admin_readonly(
+    current_user: User = Depends(get_current_user_readonly)
+) -> User:
+    return require_admin(current_user)
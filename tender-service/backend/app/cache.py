@@ -0,0 +1,219 @@
+"""
+In-process cache with cross-process invalidation.
+
+Every uvicorn worker keeps its own entries. Write paths call
+`cache.invalidate(db, namespace)`, which drops the namespace locally and
+publishes the change through an InvalidationChannel. Other workers compare
+namespace versions at most every CACHE_SYNC_INTERVAL seconds and drop the
+namespaces that changed, so a stale entry lives no longer than that interval.
+The local drop is repeated once the writer's transaction commits, so a value
+read by a concurrent request before the commit does not stay cached.
+
+Each namespace keeps at most CACHE_MAX_ENTRIES entries, least recently used
+ones are evicted first.
+
+Each organization (database.current_tenant) gets a Cache of its own.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models import CacheVersion
+
+
+class InvalidationChannel:
+    """Transport that tells other worker processes which namespaces changed."""
+
+    async def publish(self, db: AsyncSession, namespace: str) -> None:
+        raise NotImplementedError
+
+    async def versions(self) -> dict[str, int]:
+        raise NotImplementedError
+
+
+class LocalChannel(InvalidationChannel):
+    """Single-process deployments: nothing to tell other workers."""
+
+    async def publish(self, db: AsyncSession, namespace: str) -> None:
+        return None
+
+    async def versions(self) -> dict[str, int]:
+        return {}
+
+
+class DatabaseChannel(InvalidationChannel):
+    """
+    Version counters in the cache_versions table.
+    The bump runs in the caller's session, so other workers see it exactly
+    when the write that caused it is committed.
+    """
+
+    async def publish(self, db: AsyncSession, namespace: str) -> None:
+        stmt = insert(CacheVersion).values(namespace=namespace, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.namespace],
+            set_={"version": CacheVersion.version + 1},
+        )
+        await db.execute(stmt)
+
+    async def versions(self) -> dict[str, int]:
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(select(CacheVersion.namespace, CacheVersion.version))
+            return dict(result.all())
+
+
+CHANNELS: dict[str, Callable[[], InvalidationChannel]] = {
+    "database": DatabaseChannel,
+    "local": LocalChannel,
+}
+
+
+class Cache:
+    def __init__(
+        self,
+        channel: InvalidationChannel,
+        sync_interval: float = 1.0,
+        ttl: float = 300.0,
+        max_entries: int = 10000,
+    ):
+        self.channel = channel
+        self.sync_interval = sync_interval
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[str, OrderedDict[Any, tuple[float, Any]]] = {}
+        self._generations: dict[str, int] = {}
+        self._versions: dict[str, int] = {}
+        self._last_sync = 0.0
+        self._sync_lock = asyncio.Lock()
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: Any,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        ttl: Optional[float] = None,
+    ) -> Optional[Any]:
+        """
+        Return the cached value or call loader() and cache its result.
+        None results are not cached. A value loaded while the namespace was
+        invalidated is returned but not stored.
+        """
+        await self._sync()
+        now = time.monotonic()
+        entries = self._entries.get(namespace)
+        entry = entries.get(key) if entries else None
+        if entry:
+            if entry[0] > now:
+                entries.move_to_end(key)
+                return entry[1]
+            del entries[key]
+
+        generation = self._generations.get(namespace, 0)
+        value = await loader()
+        if value is not None and self._generations.get(namespace, 0) == generation:
+            expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._store(namespace, key, (expires, value))
+        return value
+
+    def _store(self, namespace: str, key: Any, entry: tuple[float, Any]) -> None:
+        entries = self._entries.setdefault(namespace, OrderedDict())
+        entries[key] = entry
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            now = time.monotonic()
+            for expired in [k for k, (expires, _) in entries.items() if expires <= now]:
+                del entries[expired]
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    async def invalidate(self, db: AsyncSession, namespace: str) -> None:
+        """
+        Drop a namespace here and publish the change to other workers. The
+        namespace is dropped again when db commits (see _drop_after_commit).
+        """
+        self._drop(namespace)
+        db.info.setdefault("cache_invalidated", []).append((self, namespace))
+        await self.channel.publish(db, namespace)
+
+    def clear(self) -> None:
+        for namespace in list(self._entries):
+            self._drop(namespace)
+
+    def _drop(self, namespace: str) -> None:
+        self._entries.pop(namespace, None)
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def _sync(self) -> None:
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        async with self._sync_lock:
+            if time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            versions = await self.channel.versions()
+            for namespace, version in versions.items():
+                if self._versions.get(namespace, 0) != version:
+                    self._drop(namespace)
+            self._versions = versions
+            self._last_sync = time.monotonic()
+
+
+class TenantCaches:
+    """Same interface as Cache, dispatching to the current organization's Cache."""
+
+    def __init__(self, factory: Callable[[], Cache]):
+        self._factory = factory
+        self._caches: dict[Optional[str], Cache] = {}
+
+    def current(self) -> Cache:
+        tenant = database.current_tenant.get()
+        if tenant not in self._caches:
+            self._caches[tenant] = self._factory()
+        return self._caches[tenant]
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: Any,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        ttl: Optional[float] = None,
+    ) -> Optional[Any]:
+        return await self.current().get_or_load(namespace, key, loader, ttl)
+
+    async def invalidate(self, db: AsyncSession, namespace: str) -> None:
+        await self.current().invalidate(db, namespace)
+
+    def clear(self) -> None:
+        for tenant_cache in self._caches.values():
+            tenant_cache.clear()
+
+    def drop(self, tenant: Optional[str]) -> None:
+        self._caches.pop(tenant, None)
+
+
+cache = TenantCaches(lambda: Cache(
+    channel=CHANNELS[settings.CACHE_INVALIDATION](),
+    sync_interval=settings.CACHE_SYNC_INTERVAL,
+    ttl=settings.CACHE_TTL,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+))
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_after_commit(session: Session):
+    # Requests that read the old rows while the transaction was open may have
+    # cached them in the meantime.
+    for namespace_cache, namespace in session.info.pop("cache_invalidated", ()):
+        namespace_cache._drop(namespace)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_invalidated(session: Session):
+    session.info.pop("cache_invalidated", None)
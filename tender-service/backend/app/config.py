@@ -3,6 +3,7 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./tender.db"
+    READ_DATABASE_URL: str = ""  # Optional replica for GET routes; see database.get_read_db
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
@@ -13,6 +14,46 @@ class Settings(BaseSettings):
     LICENSE_PRODUCT_NAME: str = "TenderSystem"
     LICENSE_KEY: str = ""  # Optional: set in env for initial setup
 
+    # In-process cache shared invalidation (see app/cache.py)
+    CACHE_INVALIDATION: str = "database"  # "database" (multi-worker) or "local"
+    CACHE_SYNC_INTERVAL: float = 1.0  # max seconds a worker serves stale entries
+    CACHE_TTL: float = 300.0
+    CACHE_MAX_ENTRIES: int = 10000  # per namespace, least recently used evicted first
+
+    # Attachments (see app/storage.py)
+    STORAGE_DIR: str = "./storage"
+    MAX_UPLOAD_SIZE: int = 1024 * 1024 * 1024  # 1 GB
+
+    # Archive job (python -m scripts.archive_tenders)
+    ARCHIVE_AFTER_DAYS: int = 180  # closed tenders untouched this long move to archive tables
+    ARCHIVE_BATCH_SIZE: int = 200
+
+    # Background jobs (see app/jobs.py)
+    JOBS_WORKERS: int = 4  # jobs run concurrently per process; 0 disables the pool
+    JOBS_POLL_INTERVAL: float = 1.0  # seconds; picks up jobs enqueued by other processes
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BACKOFF: float = 2.0  # seconds before the first retry, doubled after each failure
+    JOBS_LEASE_SECONDS: int = 300  # a job still running after this is retried by another worker
+    JOBS_DRAIN_TIMEOUT: float = 10.0  # seconds to let running jobs finish on shutdown
+
+    # Audit log write-behind buffer (see app/audit.py)
+    AUDIT_BUFFER_SIZE: int = 10000  # oldest unflushed events are dropped beyond this
+    AUDIT_BATCH_SIZE: int = 200  # flush as soon as this many events are buffered
+    AUDIT_FLUSH_INTERVAL: float = 2.0  # seconds; flush at least this often
+
+    # Multi-tenant hosting (see app/tenancy.py); DATABASE_URL then holds the organizations
+    MULTI_TENANT: bool = False
+    TENANT_DATABASE_URL: str = "sqlite+aiosqlite:///./tenants/{org}.db"
+    TENANT_BASE_DOMAIN: str = ""  # e.g. "tenders.example.com": acme.tenders.example.com -> "acme"
+    TENANT_IDLE_TIMEOUT: float = 600.0  # seconds without requests before engines are closed
+
+    # Admin sampling profiler (see app/profiling.py)
+    PROFILER_INTERVAL: float = 0.005  # seconds between samples
+    PROFILER_MAX_DURATION: float = 300.0  # longest session an admin can start, seconds
+
+    # Serve the built frontend from this process, e.g. "../frontend/dist"
+    FRONTEND_DIST_DIR: str = ""
+
     class Config:
         env_file = ".env"
 
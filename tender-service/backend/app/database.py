@@ -1,19 +1,166 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+"""
+Engines and sessions.
+
+DATABASE_URL is the main database. With MULTI_TENANT enabled it only holds the
+organizations registry, and each organization's data lives in a database of
+its own (see app/tenancy.py). The organization of the current request or job
+is kept in the current_tenant context variable. AsyncSessionLocal and
+ReadSessionLocal open sessions on that organization's engines, which are
+created on first use and disposed of after TENANT_IDLE_TIMEOUT without
+requests.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-)
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+@contextmanager
+def use_tenant(tenant: Optional[str]):
+    """Route sessions opened inside the block to this organization (None: main database)."""
+    token = current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+def _create_read_engine(url: str, read_url: str, engine: AsyncEngine) -> AsyncEngine:
+    """
+    Engine for read-only sessions. Uses read_url (e.g. a replica) if set; for a
+    SQLite file a separate pool whose connections are switched to
+    PRAGMA query_only; otherwise the main engine.
+    """
+    if read_url:
+        return create_async_engine(read_url, echo=settings.DEBUG)
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return engine
+    read_engine = create_async_engine(url, echo=settings.DEBUG)
+
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def set_query_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+    return read_engine
+
+
+class DatabaseSet:
+    """Write and read engines of one database with their session factories."""
+
+    def __init__(self, url: str, read_url: str = ""):
+        self.url = url
+        self.engine = create_async_engine(url, echo=settings.DEBUG)
+        self.read_engine = _create_read_engine(url, read_url, self.engine)
+        self.session_factory = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+        self.read_session_factory = async_sessionmaker(
+            self.read_engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+        self.last_used = time.monotonic()
+
+    async def dispose(self):
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+
+
+class TenantDatabases:
+    """Per-organization DatabaseSets, opened lazily from their registered URLs."""
+
+    def __init__(self):
+        self._urls: dict[str, str] = {}
+        self._open: dict[str, DatabaseSet] = {}
+
+    def register(self, tenant: str, url: str):
+        self._urls[tenant] = url
+
+    def is_registered(self, tenant: str) -> bool:
+        return tenant in self._urls
+
+    def get(self, tenant: str) -> DatabaseSet:
+        databases = self._open.get(tenant)
+        if databases is None:
+            if tenant not in self._urls:
+                raise LookupError(f"Unknown organization: {tenant}")
+            databases = self._open[tenant] = DatabaseSet(self._urls[tenant])
+        return databases
+
+    def touch(self, tenant: str):
+        self.get(tenant).last_used = time.monotonic()
+
+    def open_tenants(self) -> list[str]:
+        return list(self._open)
 
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+    def idle_tenants(self, timeout: float) -> list[str]:
+        now = time.monotonic()
+        return [tenant for tenant, db in self._open.items() if now - db.last_used > timeout]
+
+    async def close(self, tenant: str):
+        """
+        Dispose of an organization's engines. Sessions still holding a
+        connection finish normally; new sessions get fresh engines.
+        """
+        databases = self._open.pop(tenant, None)
+        if databases is not None:
+            await databases.dispose()
+
+    async def unregister(self, tenant: str):
+        """Close an organization's engines and forget its URL, e.g. once it is deactivated."""
+        await self.close(tenant)
+        self._urls.pop(tenant, None)
+
+    def registered_tenants(self) -> list[str]:
+        return list(self._urls)
+
+    async def close_all(self):
+        for tenant in list(self._open):
+            await self.close(tenant)
+
+
+main_database = DatabaseSet(settings.DATABASE_URL, settings.READ_DATABASE_URL)
+engine = main_database.engine
+read_engine = main_database.read_engine
+tenant_databases = TenantDatabases()
+
+
+def current_database() -> DatabaseSet:
+    tenant = current_tenant.get()
+    return main_database if tenant is None else tenant_databases.get(tenant)
+
+
+class _TenantSessionFactory:
+    """Drop-in for an async_sessionmaker that follows current_tenant."""
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+
+    def __call__(self, **kwargs) -> AsyncSession:
+        return getattr(current_database(), self.attribute)(**kwargs)
+
+
+AsyncSessionLocal = _TenantSessionFactory("session_factory")
+ReadSessionLocal = _TenantSessionFactory("read_session_factory")
 
 
 class Base(DeclarativeBase):
@@ -32,6 +179,61 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """
+    Session for GET routes. Never commits: the read transaction (if the driver
+    opened one) is simply discarded when the session closes.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+def _enable_autoincrement(sync_conn):
+    """
+    Rebuild SQLite tables declared with sqlite_autoincrement but created
+    without it. The id sequence starts above the largest id in the table and in
+    the tables listed in its info["shares_ids_with"], so no id is handed out twice.
+    """
+    if sync_conn.dialect.name != "sqlite":
+        return
+    for table in Base.metadata.sorted_tables:
+        if not table.dialect_options["sqlite"]["autoincrement"]:
+            continue
+        sql = sync_conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+        ).scalar()
+        if sql is None or "AUTOINCREMENT" in sql.upper():
+            continue
+        existing = {row[1] for row in sync_conn.execute(text(f'PRAGMA table_info("{table.name}")'))}
+        columns = ", ".join(f'"{c.name}"' for c in table.columns if c.name in existing)
+        new_name = f"_{table.name}_rebuild"
+        create = str(CreateTable(table).compile(dialect=sync_conn.dialect))
+        create = create.replace(f"CREATE TABLE {table.name} (", f'CREATE TABLE "{new_name}" (', 1)
+        sync_conn.execute(text(create))
+        sync_conn.execute(text(f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table.name}"'))
+        # Drop first and rename the copy, so foreign keys in other tables keep pointing at table.name;
+        # its indexes go with it and are recreated by _create_missing_indexes
+        sync_conn.execute(text(f'DROP TABLE "{table.name}"'))
+        sync_conn.execute(text(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"'))
+        max_id = 0
+        for name in (table.name, *table.info.get("shares_ids_with", ())):
+            if name in Base.metadata.tables:
+                max_id = max(max_id, sync_conn.execute(text(f'SELECT coalesce(max(id), 0) FROM "{name}"')).scalar())
+        sync_conn.execute(text("DELETE FROM sqlite_sequence WHERE name IN (:old, :new)"), {"old": table.name, "new": new_name})
+        sync_conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"), {"name": table.name, "seq": max_id})
+
+
+def _create_missing_indexes(sync_conn):
+    """create_all() skips existing tables, so add indexes declared later."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            # IF NOT EXISTS rather than checkfirst: reflection does not see expression indexes
+            sync_conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 async def init_db():
-    async with engine.begin() as conn:
+    """Create missing tables and indexes in the current organization's database."""
+    async with current_database().engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_enable_autoincrement)
+        await conn.run_sync(_create_missing_indexes)
@@ -0,0 +1,49 @@
+"""
+Sparse fieldsets for list endpoints: ?fields=id,title,budget
+
+Selected column names map onto load_only(), so unselected columns (in
+particular the large Text columns) are neither read from the database nor
+serialized. Without ?fields= every field except the large ones is returned.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+TENDER_FIELDS = {
+    "id", "title", "description", "category", "budget", "status",
+    "deadline", "created_by", "created_at", "bids_count",
+}
+TENDER_DEFAULT_FIELDS = TENDER_FIELDS - {"description"}
+
+BID_FIELDS = {"id", "tender_id", "bidder_id", "amount", "proposal", "status", "created_at"}
+BID_DEFAULT_FIELDS = BID_FIELDS - {"proposal"}
+
+
+def parse_fields(fields: Optional[str], allowed: set[str], default: set[str]) -> set[str]:
+    if not fields:
+        return set(default)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return requested | {"id"}
+
+
+def column_names(model, selected: set[str]) -> list[str]:
+    columns = inspect(model).columns.keys()
+    return [name for name in selected if name in columns]
+
+
+def load_columns(model, selected: set[str]):
+    """load_only() option for the selected columns of model."""
+    return load_only(*(getattr(model, name) for name in column_names(model, selected)))
+
+
+def pick(obj, selected: set[str]) -> dict:
+    """Selected column values of a loaded instance (never touches deferred ones)."""
+    return {name: getattr(obj, name) for name in column_names(type(obj), selected)}
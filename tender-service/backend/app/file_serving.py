@@ -0,0 +1,135 @@
+"""
+Blob download response with HTTP Range support.
+
+Uses the ASGI zero-copy extensions when the server advertises them
+("http.response.zerocopysend", then "http.response.pathsend"), so the file is
+handed to the kernel without passing through Python. Otherwise the requested
+range is streamed from the storage backend in fixed-size chunks.
+"""
+import re
+from typing import Optional
+from urllib.parse import quote
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.storage import StorageBackend
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single-range Range header into inclusive (start, end).
+    Returns None for a missing or multi-range header (serve the whole file).
+    Raises ValueError for an unsatisfiable range.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class BlobResponse(Response):
+    chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        sha256: str,
+        size: int,
+        filename: str,
+        media_type: str = "application/octet-stream",
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        self.backend = backend
+        self.sha256 = sha256
+        self.size = size
+        self.media_type = media_type
+        self.background = background
+        self.init_headers({})
+        etag = f'"{sha256}"'
+        if if_range and if_range != etag:
+            range_header = None
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            self.status_code = 416
+            self.range = None
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            return
+
+        if byte_range is None:
+            self.status_code = 200
+            self.range = (0, size - 1)
+        else:
+            self.status_code = 206
+            self.range = byte_range
+            self.headers["content-range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+        self.headers["content-length"] = str(self.range[1] - self.range[0] + 1)
+        self.headers["content-type"] = media_type
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = etag
+        self.headers["content-disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.range is None or scope["method"].upper() == "HEAD" or self.size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_body(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_body(self, scope: Scope, send: Send) -> None:
+        start, end = self.range
+        extensions = scope.get("extensions") or {}
+        path = self.backend.local_path(self.sha256)
+
+        if path is not None and "http.response.zerocopysend" in extensions:
+            # The extension takes a file object; the server sends from its descriptor
+            file = await anyio.to_thread.run_sync(open, path, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": end - start + 1,
+                    "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+            return
+
+        if path is not None and "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": str(path)})
+            return
+
+        async for chunk in self.backend.iter_range(self.sha256, start, end):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,110 @@
+"""
+Optional serving of the built frontend (FRONTEND_DIST_DIR) by the API process.
+
+- Hashed bundles under assets/ are sent with immutable, year-long caching;
+  index.html and other files are revalidated on every load.
+- Precompressed .br/.gz siblings are generated at startup and picked by the
+  request's Accept-Encoding. Brotli is used only if the `brotli` package is
+  installed.
+- Unknown paths fall back to index.html so client-side routes work on reload.
+"""
+import gzip
+import mimetypes
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE = {".js", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml"}
+MIN_COMPRESS_SIZE = 1024
+
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _encoders():
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+    return encoders
+
+
+def precompress(dist: Path) -> int:
+    """Write .br/.gz next to compressible files that lack an up-to-date one."""
+    written = 0
+    encoders = _encoders()
+    for path in dist.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        stat = path.stat()
+        if stat.st_size < MIN_COMPRESS_SIZE:
+            continue
+        data = None
+        for suffix, encode in encoders.items():
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            compressed = encode(data)
+            if len(compressed) < len(data):
+                target.write_bytes(compressed)
+                written += 1
+    return written
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def file_response(path: Path, request: Request, cache_control: str) -> FileResponse:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+    for encoding, suffix in ENCODINGS:
+        variant = path.with_name(path.name + suffix)
+        if encoding in accepted and variant.is_file():
+            headers["Content-Encoding"] = encoding
+            return FileResponse(variant, media_type=media_type, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def mount_frontend(app: FastAPI, dist_dir: str) -> None:
+    """Register the catch-all route. Call after all API routers are included."""
+    dist = Path(dist_dir).resolve()
+    index = dist / "index.html"
+
+    @app.get("/{path:path}", include_in_schema=False)
+    async def frontend(path: str, request: Request):
+        if path == "api" or path.startswith("api/"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        target = (dist / path).resolve()
+        if path and target.is_relative_to(dist) and target.is_file():
+            if target.suffix in (".br", ".gz"):
+                raise HTTPException(status_code=404, detail="Not Found")
+            cache = IMMUTABLE if target.parent == dist / "assets" else REVALIDATE
+            return file_response(target, request, cache)
+        if path.startswith("assets/"):
+            # Never answer a missing bundle with HTML
+            raise HTTPException(status_code=404, detail="Not Found")
+        if not index.is_file():
+            raise HTTPException(status_code=404, detail="Frontend build not found")
+        return file_response(index, request, REVALIDATE)
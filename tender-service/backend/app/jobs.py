@@ -0,0 +1,291 @@
+"""
+Durable background jobs.
+
+Routes call enqueue(db, kind, **payload) inside their own transaction, so a
+job is committed together with the change that caused it, or not at all. Once
+that commit succeeds the local worker pool is woken up. Workers started from
+the app lifespan claim due jobs under a lease, run the registered handler, and
+retry failures with exponential backoff. Jobs enqueued by other processes are
+found by polling. While a handler runs its lease is renewed every third of
+JOBS_LEASE_SECONDS, so long jobs are not claimed a second time; jobs abandoned
+by a crashed process are retried once their lease expires. With MULTI_TENANT, workers poll the jobs table of every
+organization whose database is currently open, or that has unfinished jobs:
+at startup each registered organization is checked once, and enqueueing marks
+its organization. Each job runs in its organization's context.
+
+Handlers are registered with @job("kind") (see app/tasks.py), receive the
+payload dict and open their own sessions.
+"""
+import asyncio
+import json
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import and_, delete, event, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 3600.0  # seconds
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class JobKind:
+    handler: Handler
+    concurrency: Optional[int]  # max jobs of this kind running at once per process
+    max_attempts: int
+
+
+HANDLERS: dict[str, JobKind] = {}
+
+
+def job(kind: str, concurrency: Optional[int] = None, max_attempts: Optional[int] = None):
+    def register(handler: Handler) -> Handler:
+        HANDLERS[kind] = JobKind(handler, concurrency, max_attempts or settings.JOBS_MAX_ATTEMPTS)
+        return handler
+    return register
+
+
+def enqueue(db: AsyncSession, kind: str, delay: float = 0, **payload) -> Job:
+    """Add a job to the session; it becomes visible to workers when db commits."""
+    if kind not in HANDLERS:
+        raise KeyError(f"Unknown job kind: {kind}")
+    entry = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status=JobStatus.PENDING.value,
+        attempts=0,
+        max_attempts=HANDLERS[kind].max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(entry)
+    db.info["jobs_enqueued"] = True
+    queue.has_jobs(database.current_tenant.get())
+    return entry
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session):
+    if session.info.pop("jobs_enqueued", False):
+        queue.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session: Session):
+    session.info.pop("jobs_enqueued", None)
+
+
+def _due(now: datetime):
+    return or_(
+        and_(Job.status == JobStatus.PENDING.value, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING.value, Job.locked_until < now),
+    )
+
+
+async def _has_unfinished() -> bool:
+    """Whether the current organization has jobs that are not done or failed for good."""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(exists().where(Job.status != JobStatus.FAILED.value)))
+        return bool(result.scalar())
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobQueue:
+    def __init__(self):
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._claim_lock: Optional[asyncio.Lock] = None
+        self._running: dict[str, int] = {}
+        self._stopping = False
+        self._next_tenant = 0
+        self._tenants_with_jobs: set[str] = set()  # polled even while their database is closed
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def has_jobs(self, tenant: Optional[str]):
+        if tenant is not None:
+            self._tenants_with_jobs.add(tenant)
+
+    async def start(self, workers: int):
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._stopping = False
+        if settings.MULTI_TENANT and workers:
+            await self._find_tenants_with_jobs()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    async def stop(self, timeout: float):
+        """Stop claiming jobs and wait for running ones; requeue what is left."""
+        if not self._workers:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        _, unfinished = await asyncio.wait(self._workers, timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        self._workers = []
+        self._wakeup = None
+
+    async def _work(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                claimed = await self._claim()
+            except Exception:
+                logger.exception("Claiming a job failed")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOBS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            tenant, claimed_job = claimed
+            try:
+                with database.use_tenant(tenant):
+                    await self._run(claimed_job)
+            except Exception:
+                # Recording the outcome failed (e.g. database locked): the job stays
+                # leased and is picked up again once the lease expires.
+                logger.exception("Finishing job %s (%s) failed", claimed_job.id, claimed_job.kind)
+            finally:
+                self._running[claimed_job.kind] -= 1
+
+    async def _claim(self) -> Optional[tuple[Optional[str], Job]]:
+        """Claim a due job, trying organizations in turn; returns (organization, job)."""
+        async with self._claim_lock:
+            now = datetime.utcnow()
+            saturated = [
+                kind for kind, running in self._running.items()
+                if HANDLERS[kind].concurrency is not None and running >= HANDLERS[kind].concurrency
+            ]
+            tenants = self._tenants_to_poll() if settings.MULTI_TENANT else [None]
+            for i in range(len(tenants)):
+                tenant = tenants[(self._next_tenant + i) % len(tenants)]
+                try:
+                    with database.use_tenant(tenant):
+                        claimed = await self._claim_from(now, saturated)
+                        if claimed is None and tenant in self._tenants_with_jobs and not await _has_unfinished():
+                            self._tenants_with_jobs.discard(tenant)
+                except Exception:
+                    if tenant is None:
+                        raise
+                    # One organization's database being unavailable must not stop the others
+                    logger.exception("Claiming a job of organization %s failed", tenant)
+                    continue
+                if claimed is not None:
+                    self._next_tenant += i + 1
+                    self._running[claimed.kind] = self._running.get(claimed.kind, 0) + 1
+                    return tenant, claimed
+            return None
+
+    def _tenants_to_poll(self) -> list[str]:
+        registered = set(database.tenant_databases.registered_tenants())
+        self._tenants_with_jobs &= registered  # deactivated organizations are no longer polled
+        return sorted(set(database.tenant_databases.open_tenants()) | self._tenants_with_jobs)
+
+    async def _find_tenants_with_jobs(self):
+        """Note organizations left with unfinished jobs, e.g. by the previous process."""
+        for tenant in database.tenant_databases.registered_tenants():
+            was_open = tenant in database.tenant_databases.open_tenants()
+            try:
+                with database.use_tenant(tenant):
+                    if await _has_unfinished():
+                        self._tenants_with_jobs.add(tenant)
+            except Exception:
+                logger.exception("Checking jobs of organization %s failed", tenant)
+            if not was_open and tenant not in self._tenants_with_jobs:
+                await database.tenant_databases.close(tenant)
+
+    async def _claim_from(self, now: datetime, saturated: list[str]) -> Optional[Job]:
+        async with database.AsyncSessionLocal() as db:
+            while True:
+                query = select(Job.id).where(_due(now)).order_by(Job.run_at).limit(1)
+                if saturated:
+                    query = query.where(Job.kind.not_in(saturated))
+                job_id = (await db.execute(query)).scalar_one_or_none()
+                if job_id is None:
+                    return None
+                # Conditional update: another process may have claimed it first
+                result = await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, _due(now))
+                    .values(
+                        status=JobStatus.RUNNING.value,
+                        attempts=Job.attempts + 1,
+                        locked_until=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+                    )
+                )
+                await db.commit()
+                if result.rowcount:
+                    return await db.get(Job, job_id)
+
+    async def _run(self, claimed: Job):
+        kind = HANDLERS.get(claimed.kind)
+        heartbeat = asyncio.create_task(self._renew_lease(claimed))
+        try:
+            try:
+                if kind is None:
+                    raise LookupError(f"No handler for job kind {claimed.kind!r}")
+                await kind.handler(json.loads(claimed.payload))
+            finally:
+                heartbeat.cancel()
+        except asyncio.CancelledError:
+            # Drain timed out: hand the job back without counting the attempt
+            await self._finish(claimed, status=JobStatus.PENDING.value, attempts=claimed.attempts - 1)
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed, attempt %d", claimed.id, claimed.kind, claimed.attempts)
+            if kind is None or claimed.attempts >= claimed.max_attempts:
+                await self._finish(claimed, status=JobStatus.FAILED.value, last_error=repr(exc))
+            else:
+                await self._finish(
+                    claimed,
+                    status=JobStatus.PENDING.value,
+                    run_at=datetime.utcnow() + timedelta(seconds=retry_delay(claimed.attempts)),
+                    last_error=repr(exc),
+                )
+        else:
+            async with database.AsyncSessionLocal() as db:
+                await db.execute(delete(Job).where(Job.id == claimed.id))
+                await db.commit()
+
+    async def _renew_lease(self, claimed: Job):
+        interval = settings.JOBS_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with database.AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Job)
+                        .where(Job.id == claimed.id, Job.status == JobStatus.RUNNING.value)
+                        .values(locked_until=datetime.utcnow() + timedelta(seconds=settings.JOBS_LEASE_SECONDS))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Renewing the lease of job %s failed", claimed.id)
+
+    async def _finish(self, claimed: Job, **values):
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == claimed.id).values(locked_until=None, **values))
+            await db.commit()
+
+
+queue = JobQueue()
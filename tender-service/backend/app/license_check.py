@@ -6,6 +6,7 @@ from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.cache import cache
 from app.config import settings
 from app.database import get_db
 from app.models import SystemConfig
@@ -37,7 +38,15 @@ async def require_valid_license(db: AsyncSession = Depends(get_db)) -> bool:
     if not license_key:
         return True  # No key yet - allow admin to login and configure
 
-    result = await verify_license(license_key)
+    verified = None
+
+    async def load_result():
+        nonlocal verified
+        verified = await verify_license(license_key)
+        # Only valid results are cached, so a server outage is not remembered.
+        return verified if verified.valid else None
+
+    result = await cache.get_or_load("license", license_key, load_result) or verified
     if not result.valid:
         raise HTTPException(
             status_code=403,
@@ -1,16 +1,40 @@
 from contextlib import asynccontextmanager
+from pathlib import Path
 
+import asyncio
+
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import init_db
-from app.routes import auth, tenders, bids, users, license
+from app.audit import audit
+from app.config import settings
+from app.database import init_db, tenant_databases
+from app.frontend import mount_frontend, precompress
+from app.jobs import queue
+from app.profiling import ProfilingMiddleware
+from app.tenancy import TenantMiddleware, close_idle_loop, load_organizations
+from app import tasks  # noqa: F401  registers job handlers
+from app.routes import auth, tenders, bids, users, license, attachments, anomalies, audit_log, profiling
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    if settings.FRONTEND_DIST_DIR:
+        await anyio.to_thread.run_sync(precompress, Path(settings.FRONTEND_DIST_DIR))
+    closer = None
+    if settings.MULTI_TENANT:
+        await load_organizations()
+        closer = asyncio.create_task(close_idle_loop())
+    await queue.start(settings.JOBS_WORKERS)
+    await audit.start()
     yield
+    if closer is not None:
+        closer.cancel()
+    await queue.stop(settings.JOBS_DRAIN_TIMEOUT)
+    await audit.stop()
+    await tenant_databases.close_all()
 
 
 app = FastAPI(
@@ -20,6 +44,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Middleware added last runs first
+app.add_middleware(ProfilingMiddleware)  # inside TenantMiddleware: sessions are per organization
+
+if settings.MULTI_TENANT:
+    app.add_middleware(TenantMiddleware)
+
+# Outermost, so preflights and error responses (e.g. an unknown organization) get CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
@@ -33,8 +64,15 @@ app.include_router(tenders.router, prefix="/api")
 app.include_router(bids.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(license.router, prefix="/api")
+app.include_router(attachments.router, prefix="/api")
+app.include_router(anomalies.router, prefix="/api")
+app.include_router(audit_log.router, prefix="/api")
+app.include_router(profiling.router, prefix="/api")
 
 
-@app.get("/")
-async def root():
-    return {"message": "Tender Procurement API", "docs": "/docs"}
+if settings.FRONTEND_DIST_DIR:
+    mount_frontend(app, settings.FRONTEND_DIST_DIR)
+else:
+    @app.get("/")
+    async def root():
+        return {"message": "Tender Procurement API", "docs": "/docs"}
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, event, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -22,6 +23,14 @@ class TenderStatus(str, Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # list_users: filters on role / is_active, newest first
+        Index("ix_users_role_is_active_created_at", "role", "is_active", "created_at"),
+        Index("ix_users_created_at", "created_at"),
+        # list_users: prefix search (email is matched case-insensitively, see below)
+        Index("ix_users_full_name", "full_name"),
+        Index("ix_users_company", "company"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True)
@@ -37,8 +46,68 @@ class User(Base):
     bids = relationship("Bid", back_populates="bidder")
 
 
+Index("ix_users_email_lower", func.lower(User.email))
+
+
+class UserCount(Base):
+    """
+    Number of users per role and is_active, so list_users can report totals
+    without COUNT(*). Kept up to date by the User mapper events below.
+    """
+    __tablename__ = "user_counts"
+
+    role = Column(String(50), primary_key=True)
+    is_active = Column(Boolean, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+def _adjust_user_count(connection, role, is_active, delta: int):
+    stmt = insert(UserCount).values(role=role, is_active=bool(is_active), count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserCount.role, UserCount.is_active],
+        set_={"count": UserCount.count + delta},
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(User, "after_insert")
+def _count_inserted_user(mapper, connection, user):
+    _adjust_user_count(connection, user.role, user.is_active, 1)
+
+
+@event.listens_for(User, "after_update")
+def _count_updated_user(mapper, connection, user):
+    state = inspect(user)
+    role, is_active = state.attrs.role.history, state.attrs.is_active.history
+    if not (role.has_changes() or is_active.has_changes()):
+        return
+    old_role = role.deleted[0] if role.deleted else user.role
+    old_active = is_active.deleted[0] if is_active.deleted else user.is_active
+    _adjust_user_count(connection, old_role, old_active, -1)
+    _adjust_user_count(connection, user.role, user.is_active, 1)
+
+
+@event.listens_for(User, "after_delete")
+def _count_deleted_user(mapper, connection, user):
+    _adjust_user_count(connection, user.role, user.is_active, -1)
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+
+
 class Tender(Base):
     __tablename__ = "tenders"
+    __table_args__ = (
+        # list_tenders: status/category filters, newest first
+        Index("ix_tenders_status_created_at", "status", "created_at"),
+        Index("ix_tenders_category_created_at", "category", "created_at"),
+        Index("ix_tenders_created_at", "created_at"),
+        # Ids are never reused, so archived tenders (same ids) cannot collide with new ones
+        {"sqlite_autoincrement": True, "info": {"shares_ids_with": ("tenders_archive",)}},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255))
@@ -53,10 +122,18 @@ class Tender(Base):
 
     created_by_user = relationship("User", back_populates="tenders")
     bids = relationship("Bid", back_populates="tender", cascade="all, delete-orphan")
+    attachments = relationship("Attachment", back_populates="tender", cascade="all, delete-orphan")
 
 
 class Bid(Base):
     __tablename__ = "bids"
+    __table_args__ = (
+        # get_tender_bids / bids_count / duplicate check: by tender, ordered by amount
+        Index("ix_bids_tender_id_amount", "tender_id", "amount"),
+        # get_my_bids: by bidder, newest first
+        Index("ix_bids_bidder_id_created_at", "bidder_id", "created_at"),
+        {"sqlite_autoincrement": True, "info": {"shares_ids_with": ("bids_archive",)}},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tender_id = Column(Integer, ForeignKey("tenders.id"))
@@ -69,6 +146,30 @@ class Bid(Base):
 
     tender = relationship("Tender", back_populates="bids")
     bidder = relationship("User", back_populates="bids")
+    attachments = relationship("Attachment", back_populates="bid", cascade="all, delete-orphan")
+
+
+class Attachment(Base):
+    """File attached to a tender or a bid. Content lives in app.storage, keyed by sha256."""
+    __tablename__ = "attachments"
+    __table_args__ = (
+        Index("ix_attachments_tender_id", "tender_id"),
+        Index("ix_attachments_bid_id", "bid_id"),
+        Index("ix_attachments_sha256", "sha256"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tender_id = Column(Integer, ForeignKey("tenders.id"), nullable=True)
+    bid_id = Column(Integer, ForeignKey("bids.id"), nullable=True)
+    filename = Column(String(255))
+    content_type = Column(String(255))
+    size = Column(Integer)
+    sha256 = Column(String(64), nullable=False)
+    uploaded_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    tender = relationship("Tender", back_populates="attachments")
+    bid = relationship("Bid", back_populates="attachments")
 
 
 class SystemConfig(Base):
@@ -79,3 +180,139 @@ class SystemConfig(Base):
     key = Column(String(100), unique=True, nullable=False, index=True)
     value = Column(Text, default="")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CacheVersion(Base):
+    """Per-namespace version counter used to invalidate caches across worker processes."""
+    __tablename__ = "cache_versions"
+
+    namespace = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class BidAnomaly(Base):
+    """Suspicious bidding pattern flagged by the anomaly job (app/anomalies.py)."""
+    __tablename__ = "bid_anomalies"
+    __table_args__ = (
+        Index("ix_bid_anomalies_tender_id_score", "tender_id", "score"),
+        Index("ix_bid_anomalies_kind_score", "kind", "score"),
+        Index("ix_bid_anomalies_score", "score"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tender_id = Column(Integer, ForeignKey("tenders.id"), nullable=False)
+    kind = Column(String(50), nullable=False)
+    score = Column(Float, nullable=False)
+    details = Column(Text, default="{}")  # JSON
+    detected_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TenderBidProfile(Base):
+    """Bidder set and winner of a tender, kept by the anomaly job for rotation checks."""
+    __tablename__ = "tender_bid_profiles"
+
+    tender_id = Column(Integer, ForeignKey("tenders.id"), primary_key=True)
+    bidder_set = Column(String(64), nullable=False, index=True)  # hash of sorted bidder ids
+    bidders_count = Column(Integer, nullable=False)
+    winner_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ArchivedTender(Base):
+    """Closed tender moved out of the hot table by the archive job (app/archive.py)."""
+    __tablename__ = "tenders_archive"
+    __table_args__ = (
+        Index("ix_tenders_archive_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)  # same id as in tenders
+    title = Column(String(255))
+    description = Column(Text)
+    category = Column(String(100))
+    budget = Column(Float)
+    status = Column(String(50))
+    deadline = Column(DateTime)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedBid(Base):
+    """Bid of an archived tender."""
+    __tablename__ = "bids_archive"
+    __table_args__ = (
+        Index("ix_bids_archive_tender_id_amount", "tender_id", "amount"),
+        Index("ix_bids_archive_bidder_id_created_at", "bidder_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)  # same id as in bids
+    tender_id = Column(Integer, ForeignKey("tenders_archive.id"))
+    bidder_id = Column(Integer, ForeignKey("users.id"))
+    amount = Column(Float)
+    proposal = Column(Text)
+    status = Column(String(50))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Job(Base):
+    """Background job; see app/jobs.py. Rows are deleted once the job succeeds."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String(20), nullable=False, default=JobStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)  # lease of the worker running it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AuditEvent(Base):
+    """Admin action, written in batches by app/audit.py. Append-only."""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_actor_id_id", "actor_id", "id"),
+        Index("ix_audit_log_action_id", "action", "id"),
+        Index("ix_audit_log_entity_id", "entity_type", "entity_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    actor_id = Column(Integer, nullable=True)  # no FK: entries outlive deleted users
+    action = Column(String(50), nullable=False)  # e.g. "tender.publish"
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    details = Column(Text, nullable=False, default="{}")  # JSON
+    created_at = Column(DateTime, nullable=False)
+
+
+class Organization(Base):
+    """Hosted organization; lives in the main database (see app/tenancy.py)."""
+    __tablename__ = "organizations"
+
+    id = Column(Integer, primary_key=True)
+    slug = Column(String(63), unique=True, index=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    database_url = Column(String(500), nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _backfill_user_counts(target, connection, tables=(), **kw):
+    """A newly created user_counts table starts from the users already there."""
+    if UserCount.__table__ in tables:
+        connection.execute(
+            insert(UserCount).from_select(
+                ["role", "is_active", "count"],
+                select(User.role, User.is_active, func.count()).group_by(User.role, User.is_active),
+            )
+        )
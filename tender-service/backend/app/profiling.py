@@ -0,0 +1,279 @@
+"""
+Sampling profiler for live requests, started by an admin (routes/profiling.py).
+
+While a session is active, ProfilingMiddleware picks requests by route and/or
+percentage and registers their coroutine. A daemon thread wakes every
+PROFILER_INTERVAL seconds and records one stack per selected request:
+- running on the event loop: the thread's frames down to the request. Code
+  that SQLAlchemy's asyncio layer runs in a greenlet starts a new frame chain;
+  it is joined to the event loop's frames where that greenlet was switched to;
+- suspended: the chain of awaits, ending in what it waits for (a query, an
+  HTTP call to the license server...). Async generators (async for) and
+  coroutine wrappers along the chain are followed to the frames they run.
+Samples therefore add up to wall-clock time per request, and nothing runs in
+requests that are not selected.
+
+Stacks are kept as flame-graph collapsed lines ("a;b;c <count>"). Each sample
+is also attributed to a category: the innermost frame that belongs to
+SQLAlchemy, pydantic, bcrypt or the license client, otherwise "other".
+"""
+import gc
+import random
+import sys
+import threading
+import time
+import types
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import greenlet
+except ImportError:  # installed with sqlalchemy[asyncio]; without it nothing runs in greenlets
+    greenlet = None
+
+from app import database
+from app.config import settings
+
+CATEGORIES = (
+    ("bcrypt", ("bcrypt", "passlib")),
+    ("sqlalchemy", ("sqlalchemy", "aiosqlite", "sqlite3")),
+    ("pydantic", ("pydantic", "pydantic_core", "fastapi._compat", "fastapi.encoders")),
+    ("license", ("app.licensing", "app.license_check")),
+)
+MAX_STACKS = 20000  # distinct stacks kept per session; the rest are counted as "(truncated)"
+MAX_DEPTH = 200
+KEEP_SESSIONS = 5
+WRAPPERS = ("async_generator_asend", "async_generator_athrow", "coroutine_wrapper")
+
+
+def categorize(modules: list[str]) -> str:
+    """Category of the innermost module that has one; modules are outermost first."""
+    for module in reversed(modules):
+        for category, prefixes in CATEGORIES:
+            if any(module == p or module.startswith(p + ".") for p in prefixes):
+                return category
+    return "other"
+
+
+def running_stack(thread_frame, root_frame, loop_greenlet=None) -> Optional[list]:
+    """
+    Frames from root_frame down to the frame the thread is executing. A chain
+    ending before root_frame is continued from where loop_greenlet, the event
+    loop's greenlet, switched away (SQLAlchemy's greenlet_spawn).
+    """
+    frames = []
+    frame = thread_frame
+    while len(frames) < MAX_DEPTH:
+        if frame is None:
+            frame = getattr(loop_greenlet, "gr_frame", None)
+            if frame is None or frame in frames:
+                return None
+        frames.append(frame)
+        if frame is root_frame:
+            return frames[::-1]
+        frame = frame.f_back
+    return None
+
+
+def _frame_of(awaitable):
+    return (
+        getattr(awaitable, "cr_frame", None)
+        or getattr(awaitable, "ag_frame", None)
+        or getattr(awaitable, "gi_frame", None)
+    )
+
+
+def _wrapped(awaitable):
+    """
+    The coroutine or async generator behind an async_generator_asend/athrow
+    (what "async for" awaits) or a coroutine_wrapper, which expose no frame.
+    """
+    for referent in gc.get_referents(awaitable):
+        if isinstance(referent, (types.CoroutineType, types.AsyncGeneratorType, types.GeneratorType)):
+            return referent
+    return None
+
+
+def awaiting_stack(coro) -> tuple[list, str]:
+    """Frames along the await chain of a suspended coroutine, and what it waits on."""
+    frames = []
+    awaitable = coro
+    while awaitable is not None and len(frames) < MAX_DEPTH:
+        frame = _frame_of(awaitable)
+        if frame is None and type(awaitable).__name__ in WRAPPERS:
+            wrapped = _wrapped(awaitable)
+            frame = _frame_of(wrapped)
+            if frame is not None:
+                awaitable = wrapped
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = (
+            getattr(awaitable, "cr_await", None)
+            or getattr(awaitable, "ag_await", None)
+            or getattr(awaitable, "gi_yieldfrom", None)
+        )
+    waiting_on = type(awaitable).__name__ if awaitable is not None else "?"
+    return frames, f"(await {waiting_on})"
+
+
+@dataclass
+class ProfileSession:
+    route: Optional[str]
+    percent: float
+    duration: float
+    tenant: Optional[str] = None
+    interval: float = settings.PROFILER_INTERVAL
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    requests: int = 0
+    samples: int = 0
+    missed: int = 0  # samples of a running request whose frames did not lead back to it
+    stacks: Counter = field(default_factory=Counter)
+    categories: Counter = field(default_factory=Counter)
+    stopped: bool = False
+
+    def __post_init__(self):
+        self._deadline = time.monotonic() + self.duration
+        self._route_regex = compile_path(self.route)[0] if self.route else None
+        self._lock = threading.Lock()  # the sampler thread writes, API requests read
+
+    @property
+    def active(self) -> bool:
+        return not self.stopped and time.monotonic() < self._deadline
+
+    def selects(self, path: str) -> bool:
+        if path.startswith("/api/profiling"):
+            return False
+        if self._route_regex is not None and not self._route_regex.match(path):
+            return False
+        return self.percent >= 100 or random.random() * 100 < self.percent
+
+    def add(self, frames: list, leaf: Optional[str] = None):
+        modules = [f.f_globals.get("__name__", "?") for f in frames]
+        labels = [f"{module}:{f.f_code.co_qualname}" for module, f in zip(modules, frames)]
+        if leaf:
+            labels.append(leaf)
+        stack = ";".join(labels)
+        with self._lock:
+            if stack in self.stacks or len(self.stacks) < MAX_STACKS:
+                self.stacks[stack] += 1
+            else:
+                self.stacks["(truncated)"] += 1
+            self.categories[categorize(modules)] += 1
+            self.samples += 1
+
+    def collapsed(self, category: Optional[str] = None) -> str:
+        """Collapsed stacks for flamegraph.pl / speedscope, optionally of one category only."""
+        with self._lock:
+            stacks = self.stacks.most_common()
+        lines = []
+        for stack, count in stacks:
+            modules = [label.split(":", 1)[0] for label in stack.split(";")]
+            if category is None or categorize(modules) == category:
+                lines.append(f"{stack} {count}")
+        return "\n".join(lines) + "\n"
+
+    def breakdown(self) -> dict[str, float]:
+        """Sampled seconds per category."""
+        with self._lock:
+            counts = dict(self.categories)
+        return {name: round(counts.get(name, 0) * self.interval, 3) for name, _ in CATEGORIES + (("other", ()),)}
+
+
+class Profiler:
+    def __init__(self):
+        self.sessions: list[ProfileSession] = []
+        self._session: Optional[ProfileSession] = None
+        self._requests: dict[int, object] = {}  # id -> coroutine of a selected request
+        self._loop_thread: Optional[int] = None
+        self._loop_greenlet = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> Optional[ProfileSession]:
+        session = self._session
+        return session if session is not None and session.active else None
+
+    def start(self, session: ProfileSession) -> ProfileSession:
+        if self.current is not None:
+            raise RuntimeError("A profiling session is already running")
+        self._loop_thread = threading.get_ident()
+        if greenlet is not None:
+            loop_greenlet = greenlet.getcurrent()
+            while loop_greenlet.parent is not None:
+                loop_greenlet = loop_greenlet.parent
+            self._loop_greenlet = loop_greenlet
+        self._session = session
+        self.sessions = (self.sessions + [session])[-KEEP_SESSIONS:]
+        self._thread = threading.Thread(target=self._sample, args=(session,), daemon=True, name="profiler")
+        self._thread.start()
+        return session
+
+    def stop(self) -> Optional[ProfileSession]:
+        session = self._session
+        if session is not None:
+            session.stopped = True
+        return session
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        return next((s for s in self.sessions if s.id == session_id), None)
+
+    def track(self, coro) -> int:
+        key = id(coro)
+        self._requests[key] = coro
+        return key
+
+    def untrack(self, key: int):
+        self._requests.pop(key, None)
+
+    def _sample(self, session: ProfileSession):
+        while session.active:
+            time.sleep(session.interval)
+            thread_frame = sys._current_frames().get(self._loop_thread)
+            for coro in list(self._requests.values()):
+                if coro.cr_running:
+                    frames = running_stack(thread_frame, coro.cr_frame, self._loop_greenlet)
+                    if frames:
+                        session.add(frames)
+                    else:
+                        session.missed += 1
+                elif coro.cr_frame is not None:
+                    frames, leaf = awaiting_stack(coro)
+                    if frames:
+                        session.add(frames, leaf)
+        session.stopped = True
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Registers requests chosen by the active profiling session with the sampler."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        session = profiler.current
+        if (
+            session is None
+            or scope["type"] != "http"
+            or session.tenant != database.current_tenant.get()
+            or not session.selects(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+        session.requests += 1
+        coro = self.app(scope, receive, send)
+        key = profiler.track(coro)
+        try:
+            await coro
+        finally:
+            profiler.untrack(key)
@@ -0,0 +1,51 @@
+"""Admin report over flags saved by the anomaly job (app/anomalies.py)."""
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.database import get_read_db
+from app.models import User, Tender, BidAnomaly
+from app.schemas import AnomalyResponse
+from app.auth import get_current_admin_readonly
+
+router = APIRouter(prefix="/anomalies", tags=["anomalies"])
+
+
+@router.get("", response_model=list[AnomalyResponse])
+async def list_anomalies(
+    kind: Optional[str] = None,
+    tender_id: Optional[int] = None,
+    min_score: float = 0.0,
+    skip: int = 0,
+    limit: int = Query(50, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
+):
+    """Flagged tenders, highest score first. Admin only."""
+    query = (
+        select(BidAnomaly, Tender.title)
+        .outerjoin(Tender, Tender.id == BidAnomaly.tender_id)
+        .where(BidAnomaly.score >= min_score)
+    )
+    if kind:
+        query = query.where(BidAnomaly.kind == kind)
+    if tender_id is not None:
+        query = query.where(BidAnomaly.tender_id == tender_id)
+    # Ties newest first: the score indexes end in the rowid, so both columns read backwards.
+    query = query.order_by(BidAnomaly.score.desc(), BidAnomaly.id.desc()).offset(skip).limit(limit)
+    result = await db.execute(query)
+    return [
+        AnomalyResponse(
+            id=anomaly.id,
+            tender_id=anomaly.tender_id,
+            tender_title=title,
+            kind=anomaly.kind,
+            score=anomaly.score,
+            details=json.loads(anomaly.details or "{}"),
+            detected_at=anomaly.detected_at,
+        )
+        for anomaly, title in result.all()
+    ]
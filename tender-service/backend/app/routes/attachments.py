@@ -0,0 +1,218 @@
+"""
+Tender and bid attachments.
+Uploads are sent as the raw request body (?filename=...) and streamed to
+storage chunk by chunk; downloads support Range requests.
+"""
+import mimetypes
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app import database
+from app.archive import find_tender
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import User, Tender, Bid, Attachment, ArchivedBid
+from app.schemas import AttachmentResponse
+from app.auth import get_current_user, get_current_admin, get_current_user_readonly
+from app.file_serving import BlobResponse
+from app.storage import storage, UploadTooLarge
+
+router = APIRouter(prefix="/attachments", tags=["attachments"])
+
+
+async def blob_referenced(sha256: str) -> bool:
+    # A session per check, so each one sees the latest committed rows
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.count()).select_from(Attachment).where(Attachment.sha256 == sha256)
+        )
+        return bool(result.scalar())
+
+
+async def release_blobs(sha256s: list[str]):
+    """Delete blobs no attachment refers to any more. Runs after the response."""
+    for sha256 in set(sha256s):
+        if not await blob_referenced(sha256):
+            await storage.delete(sha256, lambda sha256=sha256: blob_referenced(sha256))
+
+
+async def store_upload(
+    request: Request,
+    db: AsyncSession,
+    filename: str,
+    current_user: User,
+    **owner,
+) -> Attachment:
+    # End the read transaction before a potentially long upload so the
+    # session does not hold database locks while bytes arrive.
+    await db.commit()
+    try:
+        blob = await storage.save(request.stream(), settings.MAX_UPLOAD_SIZE)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    content_type = request.headers.get("content-type") or ""
+    if not content_type or content_type == "application/octet-stream":
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    # Commit the row before publishing the blob: release_blobs() re-counts
+    # references after moving a blob aside, so it will see this one.
+    try:
+        attachment = Attachment(
+            filename=filename,
+            content_type=content_type,
+            size=blob.size,
+            sha256=blob.sha256,
+            uploaded_by=current_user.id,
+            **owner,
+        )
+        db.add(attachment)
+        await db.flush()
+        await db.refresh(attachment)
+        await db.commit()
+    except BaseException:
+        await storage.discard(blob)
+        raise
+    try:
+        await storage.publish(blob)
+    except BaseException:
+        await storage.discard(blob)
+        await db.delete(attachment)
+        await db.commit()
+        raise
+    return attachment
+
+
+async def get_accessible_attachment(
+    attachment_id: int,
+    db: AsyncSession,
+    current_user: User,
+) -> Attachment:
+    result = await db.execute(select(Attachment).where(Attachment.id == attachment_id))
+    attachment = result.scalar_one_or_none()
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    if current_user.role == "admin":
+        return attachment
+    if attachment.bid_id is not None:
+        bid_result = await db.execute(
+            select(Bid.bidder_id).where(Bid.id == attachment.bid_id)
+            .union_all(select(ArchivedBid.bidder_id).where(ArchivedBid.id == attachment.bid_id))
+        )
+        if bid_result.scalars().first() != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+    else:
+        tender = await find_tender(db, attachment.tender_id)
+        if tender is None or tender.status == "draft":
+            raise HTTPException(status_code=403, detail="Access denied")
+    return attachment
+
+
+@router.post("/tender/{tender_id}", response_model=AttachmentResponse)
+async def upload_tender_attachment(
+    tender_id: int,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    result = await db.execute(select(Tender.id).where(Tender.id == tender_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    return await store_upload(request, db, filename, current_user, tender_id=tender_id)
+
+
+@router.post("/bid/{bid_id}", response_model=AttachmentResponse)
+async def upload_bid_attachment(
+    bid_id: int,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.execute(
+        select(Bid.bidder_id, Tender.status)
+        .join(Tender, Tender.id == Bid.tender_id)
+        .where(Bid.id == bid_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Bid not found")
+    if row.bidder_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if row.status != "bidding":
+        raise HTTPException(status_code=400, detail="Tender is not accepting bids")
+    return await store_upload(request, db, filename, current_user, bid_id=bid_id)
+
+
+@router.get("/tender/{tender_id}", response_model=list[AttachmentResponse])
+async def list_tender_attachments(
+    tender_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    tender = await find_tender(db, tender_id)
+    if tender is None:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    if tender.status == "draft" and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    result = await db.execute(
+        select(Attachment).where(Attachment.tender_id == tender_id).order_by(Attachment.id)
+    )
+    return result.scalars().all()
+
+
+@router.get("/bid/{bid_id}", response_model=list[AttachmentResponse])
+async def list_bid_attachments(
+    bid_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    result = await db.execute(
+        select(Bid.bidder_id).where(Bid.id == bid_id)
+        .union_all(select(ArchivedBid.bidder_id).where(ArchivedBid.id == bid_id))
+    )
+    bidder_id = result.scalars().first()
+    if bidder_id is None:
+        raise HTTPException(status_code=404, detail="Bid not found")
+    if bidder_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    result = await db.execute(
+        select(Attachment).where(Attachment.bid_id == bid_id).order_by(Attachment.id)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    attachment = await get_accessible_attachment(attachment_id, db, current_user)
+    return BlobResponse(
+        storage,
+        sha256=attachment.sha256,
+        size=attachment.size,
+        filename=attachment.filename,
+        media_type=attachment.content_type,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+    )
+
+
+@router.delete("/{attachment_id}")
+async def delete_attachment(
+    attachment_id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    attachment = await get_accessible_attachment(attachment_id, db, current_user)
+    if attachment.uploaded_by != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    await db.delete(attachment)
+    await db.flush()
+    background_tasks.add_task(release_blobs, [attachment.sha256])
+    return {"message": "Attachment deleted"}
@@ -0,0 +1,56 @@
+"""Admin view of the audit log written by app/audit.py."""
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.database import get_read_db
+from app.models import User, AuditEvent
+from app.schemas import AuditEventResponse
+from app.auth import get_current_admin_readonly
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+@router.get("", response_model=list[AuditEventResponse])
+async def list_audit_events(
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    before_id: Optional[int] = Query(None, description="Cursor: id of the last event of the previous page"),
+    limit: int = Query(50, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
+):
+    """
+    Audit events, newest first. Admin only.
+    Events reach the table in batches, a few seconds after the action.
+    """
+    query = select(AuditEvent, User.email).outerjoin(User, User.id == AuditEvent.actor_id)
+    if actor_id is not None:
+        query = query.where(AuditEvent.actor_id == actor_id)
+    if action:
+        query = query.where(AuditEvent.action == action)
+    if entity_type:
+        query = query.where(AuditEvent.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.where(AuditEvent.entity_id == entity_id)
+    if before_id is not None:
+        query = query.where(AuditEvent.id < before_id)
+    result = await db.execute(query.order_by(AuditEvent.id.desc()).limit(limit))
+    return [
+        AuditEventResponse(
+            id=event.id,
+            actor_id=event.actor_id,
+            actor_email=email,
+            action=event.action,
+            entity_type=event.entity_type,
+            entity_id=event.entity_id,
+            details=json.loads(event.details or "{}"),
+            created_at=event.created_at,
+        )
+        for event, email in result.all()
+    ]
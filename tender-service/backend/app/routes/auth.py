@@ -3,14 +3,17 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.audit import audit
+from app.cache import cache
 from app.database import get_db
+from app.jobs import enqueue
 from app.models import User
 from app.schemas import UserCreate, UserResponse, Token
 from app.auth import (
     verify_password,
     get_password_hash,
     create_access_token,
-    get_current_user,
+    get_current_user_readonly,
     get_current_admin,
 )
 from app.license_check import require_valid_license
@@ -40,6 +43,8 @@ async def register(
     db.add(user)
     await db.flush()
     await db.refresh(user)
+    await cache.invalidate(db, "user_counts")
+    enqueue(db, "user_registered", user_id=user.id)
     return user
 
 
@@ -68,7 +73,7 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user_readonly)):
     return current_user
 
 
@@ -91,4 +96,6 @@ async def register_admin(
     db.add(user)
     await db.flush()
     await db.refresh(user)
+    await cache.invalidate(db, "user_counts")
+    audit.record(db, current_user, "user.create_admin", "user", user.id, email=user.email)
     return user
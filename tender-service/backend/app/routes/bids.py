@@ -1,15 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import math
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import aliased
 
-from app.database import get_db
-from app.models import User, Tender, Bid
-from app.schemas import BidCreate, BidResponse, BidWithBidder, UserResponse
-from app.auth import get_current_user, get_current_admin
+from app.archive import find_tender, tender_models
+from app.audit import audit
+from app.cache import cache
+from app.database import get_db, get_read_db
+from app.jobs import enqueue
+from app.models import User, Tender, Bid, ArchivedTender, TenderStatus
+from app.schemas import (
+    BidCreate,
+    BidResponse,
+    BidListItem,
+    MyBidItem,
+    MyBidsPage,
+    TenderSummary,
+    UserResponse,
+    EvaluationRequest,
+    EvaluationResponse,
+    ScoredBid,
+)
+from app.scoring import CRITERIA, DEFAULT_WEIGHTS, NORMALIZATIONS, evaluate_tender, invalidate_scores
+from app.auth import (
+    get_current_user,
+    get_current_admin,
+    get_current_user_readonly,
+    get_current_admin_readonly,
+)
+from app.fieldsets import BID_FIELDS, BID_DEFAULT_FIELDS, parse_fields, load_columns, pick
 
 router = APIRouter(prefix="/bids", tags=["bids"])
 
+BID_STATUSES = ("pending", "accepted", "rejected")
+
+
+def encode_cursor(created_at: datetime, bid_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{bid_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, bid_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(bid_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.post("", response_model=BidResponse)
 async def create_bid(
@@ -39,49 +81,194 @@ async def create_bid(
     db.add(bid)
     await db.flush()
     await db.refresh(bid)
+    await cache.invalidate(db, "tenders")  # bids_count
+    await invalidate_scores(db, bid.tender_id)
     return bid
 
 
-@router.get("/tender/{tender_id}", response_model=list[BidWithBidder])
+@router.get("/tender/{tender_id}", response_model=list[BidListItem], response_model_exclude_unset=True)
 async def get_tender_bids(
     tender_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    fields: Optional[str] = Query(None, description="Comma-separated fields; proposal is excluded by default"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
 ):
-    result = await db.execute(select(Tender).where(Tender.id == tender_id))
-    tender = result.scalar_one_or_none()
-    if not tender:
+    selected = parse_fields(fields, BID_FIELDS | {"bidder"}, BID_DEFAULT_FIELDS | {"bidder"})
+    tender = await find_tender(db, tender_id)
+    if tender is None:
         raise HTTPException(status_code=404, detail="Tender not found")
+    _, BidModel = tender_models(isinstance(tender, ArchivedTender))
+    columns = selected | {"bidder_id"} if "bidder" in selected else selected
     bids_result = await db.execute(
-        select(Bid).where(Bid.tender_id == tender_id).order_by(Bid.amount)
+        select(BidModel)
+        .options(load_columns(BidModel, columns))
+        .where(BidModel.tender_id == tender_id)
+        .order_by(BidModel.amount)
     )
     bids = bids_result.scalars().all()
+    bidders = {}
+    if "bidder" in selected and bids:
+        users_result = await db.execute(
+            select(User).where(User.id.in_({bid.bidder_id for bid in bids}))
+        )
+        bidders = {user.id: UserResponse.model_validate(user) for user in users_result.scalars()}
     response = []
     for bid in bids:
-        await db.refresh(bid, ["bidder"])
-        response.append(BidWithBidder(
-            id=bid.id,
-            tender_id=bid.tender_id,
-            bidder_id=bid.bidder_id,
-            amount=bid.amount,
-            proposal=bid.proposal,
-            status=bid.status,
-            created_at=bid.created_at,
-            bidder=UserResponse.model_validate(bid.bidder)
-        ))
+        item = BidListItem(**pick(bid, selected))
+        if "bidder" in selected:
+            item.bidder = bidders.get(bid.bidder_id)
+        response.append(item)
     return response
 
 
-@router.get("/my", response_model=list[BidResponse])
+@router.get("/my", response_model=list[BidListItem], response_model_exclude_unset=True)
 async def get_my_bids(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    fields: Optional[str] = Query(None, description="Comma-separated fields; proposal is excluded by default"),
+    archived: bool = Query(False, description="List bids on archived tenders instead"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
 ):
+    selected = parse_fields(fields, BID_FIELDS, BID_DEFAULT_FIELDS)
+    _, BidModel = tender_models(archived)
     result = await db.execute(
-        select(Bid).where(Bid.bidder_id == current_user.id).order_by(Bid.created_at.desc())
+        select(BidModel)
+        .options(load_columns(BidModel, selected))
+        .where(BidModel.bidder_id == current_user.id)
+        .order_by(BidModel.created_at.desc())
+    )
+    return [BidListItem(**pick(bid, selected)) for bid in result.scalars().all()]
+
+
+@router.get("/my/overview", response_model=MyBidsPage)
+async def get_my_bids_overview(
+    status_filter: Optional[list[str]] = Query(None, alias="status", description="Bid statuses to include"),
+    tender_status: Optional[list[str]] = Query(None, description="Tender statuses to include"),
+    include_proposal: bool = False,
+    archived: bool = Query(False, description="Bids on archived tenders instead"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    """
+    Caller's bids, newest first, each with its tender summary, current rank
+    and number of competing bids, in a single query.
+    """
+    if status_filter and set(status_filter) - set(BID_STATUSES):
+        raise HTTPException(status_code=400, detail="Invalid bid status")
+    if tender_status and set(tender_status) - {s.value for s in TenderStatus}:
+        raise HTTPException(status_code=400, detail="Invalid tender status")
+    TenderModel, BidModel = tender_models(archived)
+    other = aliased(BidModel)
+    rank = (
+        select(func.count() + 1)
+        .where(other.tender_id == BidModel.tender_id, other.amount < BidModel.amount)
+        .scalar_subquery()
+    )
+    bids_count = select(func.count()).where(other.tender_id == BidModel.tender_id).scalar_subquery()
+    columns = [BidModel.id, BidModel.amount, BidModel.status, BidModel.created_at]
+    if include_proposal:
+        columns.append(BidModel.proposal)
+    query = (
+        select(
+            *columns,
+            rank.label("rank"),
+            bids_count.label("bids_count"),
+            TenderModel.id.label("tender_id"),
+            TenderModel.title,
+            TenderModel.category,
+            TenderModel.budget,
+            TenderModel.status.label("tender_status"),
+            TenderModel.deadline,
+        )
+        .join(TenderModel, TenderModel.id == BidModel.tender_id)
+        .where(BidModel.bidder_id == current_user.id)
+    )
+    if status_filter:
+        query = query.where(BidModel.status.in_(status_filter))
+    if tender_status:
+        query = query.where(TenderModel.status.in_(tender_status))
+    if cursor:
+        created_at, bid_id = decode_cursor(cursor)
+        query = query.where(or_(
+            BidModel.created_at < created_at,
+            and_(BidModel.created_at == created_at, BidModel.id < bid_id),
+        ))
+    query = query.order_by(BidModel.created_at.desc(), BidModel.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    items = [
+        MyBidItem(
+            id=row.id,
+            amount=row.amount,
+            proposal=row.proposal if include_proposal else None,
+            status=row.status,
+            created_at=row.created_at,
+            rank=row.rank,
+            bids_count=row.bids_count,
+            tender=TenderSummary(
+                id=row.tender_id,
+                title=row.title,
+                category=row.category,
+                budget=row.budget,
+                status=row.tender_status,
+                deadline=row.deadline,
+            ),
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return MyBidsPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("/tender/{tender_id}/evaluate", response_model=EvaluationResponse)
+async def evaluate_tender_bids(
+    tender_id: int,
+    data: EvaluationRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
+):
+    """
+    Rank the tender's bids by weighted criteria and return the shortlist.
+    Admin only. The tender's bids are cached until they change; bidder
+    history and weights are applied per request.
+    """
+    weights = dict(DEFAULT_WEIGHTS) if data.weights is None else data.weights
+    unknown = set(weights) - set(CRITERIA)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown criteria: {', '.join(sorted(unknown))}")
+    if not all(math.isfinite(w) and w >= 0 for w in weights.values()) or not any(weights.values()):
+        raise HTTPException(status_code=400, detail="Weights must be finite, non-negative and not all zero")
+    if data.normalization not in NORMALIZATIONS:
+        raise HTTPException(status_code=400, detail="Invalid normalization")
+    if not 1 <= data.limit <= 1000:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
+
+    result = await db.execute(select(Tender.budget).where(Tender.id == tender_id))
+    budget = result.scalar_one_or_none()
+    if budget is None:
+        raise HTTPException(status_code=404, detail="Tender not found")
+
+    ranking = await evaluate_tender(db, tender_id, budget, weights, data.normalization)
+    top = min(data.limit, len(ranking))
+    shortlist = [
+        ScoredBid(
+            rank=i + 1,
+            bid_id=int(ranking.bid_ids[i]),
+            bidder_id=int(ranking.bidder_ids[i]),
+            amount=float(ranking.amounts[i]),
+            score=round(float(ranking.scores[i]), 6),
+            criteria={name: round(float(values[i]), 6) for name, values in ranking.criteria.items()},
+        )
+        for i in range(top)
+    ]
+    return EvaluationResponse(
+        tender_id=tender_id,
+        bids_total=len(ranking),
+        weights=weights,
+        normalization=data.normalization,
+        shortlist=shortlist,
     )
-    bids = result.scalars().all()
-    return bids
 
 
 class BidStatusUpdate(BaseModel):
@@ -108,5 +295,8 @@ async def update_bid_status(
         tender = tender_result.scalar_one_or_none()
         if tender:
             tender.status = "awarded"
+            await cache.invalidate(db, "tenders")
     await db.flush()
+    enqueue(db, "bid_status_changed", bid_id=bid.id, status=status)
+    audit.record(db, current_user, "bid.status", "bid", bid.id, tender_id=bid.tender_id, status=status)
     return {"message": "Bid status updated", "status": status}
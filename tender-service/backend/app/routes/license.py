@@ -4,9 +4,11 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.audit import audit
+from app.cache import cache
+from app.database import get_db, get_read_db
 from app.models import User, SystemConfig
-from app.auth import get_current_admin
+from app.auth import get_current_admin, get_current_admin_readonly
 from app.licensing import verify_license
 
 router = APIRouter(prefix="/license", tags=["license"])
@@ -38,8 +40,8 @@ async def get_license_key(db: AsyncSession) -> str | None:
 
 @router.get("/status", response_model=LicenseStatusResponse)
 async def get_license_status(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
 ):
     """
     Get current license status.
@@ -97,6 +99,8 @@ async def configure_license(
         config = SystemConfig(key="license_key", value=license_key)
         db.add(config)
     await db.flush()
+    await cache.invalidate(db, "license")
+    audit.record(db, current_user, "license.configure", "license", key_suffix=license_key[-4:])
 
     return LicenseStatusResponse(
         configured=True,
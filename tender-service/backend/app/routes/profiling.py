@@ -0,0 +1,108 @@
+"""Admin control of the sampling profiler (app/profiling.py)."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from app.config import settings
+from app.database import current_tenant
+from app.models import User
+from app.profiling import CATEGORIES, ProfileSession, profiler
+from app.schemas import ProfileStart, ProfileSessionResponse
+from app.auth import get_current_admin_readonly
+
+router = APIRouter(prefix="/profiling", tags=["profiling"])
+
+
+def session_response(session: ProfileSession) -> ProfileSessionResponse:
+    return ProfileSessionResponse(
+        id=session.id,
+        route=session.route,
+        percent=session.percent,
+        duration=session.duration,
+        started_at=session.started_at,
+        active=session.active,
+        requests=session.requests,
+        samples=session.samples,
+        interval=session.interval,
+        seconds_by_category=session.breakdown(),
+    )
+
+
+def get_session(session_id: str) -> ProfileSession:
+    session = profiler.get(session_id)
+    if session is None or session.tenant != current_tenant.get():
+        raise HTTPException(status_code=404, detail="Profiling session not found")
+    return session
+
+
+@router.post("/start", response_model=ProfileSessionResponse)
+async def start_profiling(
+    data: ProfileStart,
+    current_user: User = Depends(get_current_admin_readonly)
+):
+    """
+    Sample a share of live requests for a limited time. Admin only.
+    Profiling is per worker process: with several workers, each request is
+    sampled only by the worker that received this call.
+    """
+    if not 0 < data.percent <= 100:
+        raise HTTPException(status_code=400, detail="Percent must be in (0, 100]")
+    if not 0 < data.duration <= settings.PROFILER_MAX_DURATION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Duration must be between 0 and {settings.PROFILER_MAX_DURATION:g} seconds",
+        )
+    if data.route is not None and not data.route.startswith("/"):
+        raise HTTPException(status_code=400, detail="Route must be a path such as /api/tenders/{tender_id}")
+    session = ProfileSession(
+        route=data.route,
+        percent=data.percent,
+        duration=data.duration,
+        tenant=current_tenant.get(),
+    )
+    try:
+        profiler.start(session)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session_response(session)
+
+
+@router.post("/stop", response_model=Optional[ProfileSessionResponse])
+async def stop_profiling(current_user: User = Depends(get_current_admin_readonly)):
+    session = profiler.current
+    if session is None or session.tenant != current_tenant.get():
+        return None
+    profiler.stop()
+    return session_response(session)
+
+
+@router.get("", response_model=list[ProfileSessionResponse])
+async def list_profiles(current_user: User = Depends(get_current_admin_readonly)):
+    """Recent sessions of this worker, newest first."""
+    return [
+        session_response(session)
+        for session in reversed(profiler.sessions)
+        if session.tenant == current_tenant.get()
+    ]
+
+
+@router.get("/{session_id}", response_model=ProfileSessionResponse)
+async def get_profile(session_id: str, current_user: User = Depends(get_current_admin_readonly)):
+    return session_response(get_session(session_id))
+
+
+@router.get("/{session_id}/stacks", response_class=PlainTextResponse)
+async def download_stacks(
+    session_id: str,
+    category: Optional[str] = Query(None, description="Only stacks of this category"),
+    current_user: User = Depends(get_current_admin_readonly)
+):
+    """Collapsed stacks ("frame;frame;frame count"), for flamegraph.pl or speedscope."""
+    session = get_session(session_id)
+    if category is not None and category not in {name for name, _ in CATEGORIES} | {"other"}:
+        raise HTTPException(status_code=400, detail="Unknown category")
+    suffix = f"-{category}" if category else ""
+    return PlainTextResponse(
+        session.collapsed(category),
+        headers={"Content-Disposition": f'attachment; filename="profile-{session.id}{suffix}.folded"'},
+    )
@@ -1,76 +1,105 @@
+import base64
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, delete, and_, or_
+from sqlalchemy.orm import aliased, defer
 
-from app.database import get_db
-from app.models import User, Tender, Bid
-from app.schemas import TenderCreate, TenderUpdate, TenderResponse
-from app.auth import get_current_user, get_current_admin
+from app.archive import find_tender, tender_models
+from app.audit import audit
+from app.cache import cache
+from app.database import get_db, get_read_db
+from app.jobs import enqueue
+from app.models import User, Tender, Bid, Attachment, BidAnomaly, TenderBidProfile, ArchivedTender
+from app.schemas import (
+    TenderCreate,
+    TenderUpdate,
+    TenderResponse,
+    TenderListItem,
+    TenderDetailResponse,
+    RankedBid,
+    UserResponse,
+)
+from app.auth import get_current_admin, get_current_user_readonly
+from app.fieldsets import TENDER_FIELDS, TENDER_DEFAULT_FIELDS, parse_fields, load_columns, pick
+from app.routes.attachments import release_blobs
+from app.scoring import invalidate_scores
 
 router = APIRouter(prefix="/tenders", tags=["tenders"])
 
 
-@router.get("", response_model=list[TenderResponse])
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(ids: str) -> list[int]:
+    try:
+        parsed = {int(part) for part in ids.split(",") if part.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return list(parsed)
+
+
+@router.get("", response_model=list[TenderListItem], response_model_exclude_unset=True)
 async def list_tenders(
     status_filter: Optional[str] = Query(None, alias="status"),
     category: Optional[str] = None,
     include_drafts: bool = False,
+    archived: bool = Query(False, description="List archived (closed, old) tenders instead"),
+    ids: Optional[str] = Query(None, description="Comma-separated tender ids to fetch in one request, returned by id; skip/limit are ignored"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields; description is excluded by default"),
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
 ):
-    query = select(Tender)
+    selected = parse_fields(fields, TENDER_FIELDS, TENDER_DEFAULT_FIELDS)
+    TenderModel, BidModel = tender_models(archived)
+    query = select(TenderModel).options(load_columns(TenderModel, selected))
     if not (include_drafts and current_user.role == "admin"):
-        query = query.where(Tender.status != "draft")
+        query = query.where(TenderModel.status != "draft")
     if status_filter:
-        query = query.where(Tender.status == status_filter)
+        query = query.where(TenderModel.status == status_filter)
     if category:
-        query = query.where(Tender.category == category)
-    query = query.order_by(desc(Tender.created_at)).offset(skip).limit(limit)
+        query = query.where(TenderModel.category == category)
+    if ids is not None:
+        query = query.where(TenderModel.id.in_(parse_ids(ids))).order_by(TenderModel.id)
+    else:
+        query = query.order_by(desc(TenderModel.created_at)).offset(skip).limit(limit)
     result = await db.execute(query)
     tenders = result.scalars().all()
-    response = []
-    for t in tenders:
+    bids_counts = {}
+    if "bids_count" in selected and tenders:
         count_result = await db.execute(
-            select(func.count()).select_from(Bid).where(Bid.tender_id == t.id)
+            select(BidModel.tender_id, func.count())
+            .where(BidModel.tender_id.in_([t.id for t in tenders]))
+            .group_by(BidModel.tender_id)
         )
-        bids_count = count_result.scalar() or 0
-        response.append(TenderResponse(
-            id=t.id,
-            title=t.title,
-            description=t.description,
-            category=t.category,
-            budget=t.budget,
-            status=t.status,
-            deadline=t.deadline,
-            created_by=t.created_by,
-            created_at=t.created_at,
-            bids_count=bids_count
-        ))
+        bids_counts = dict(count_result.all())
+    response = []
+    for t in tenders:
+        item = TenderListItem(**pick(t, selected))
+        if "bids_count" in selected:
+            item.bids_count = bids_counts.get(t.id, 0)
+        response.append(item)
     return response
 
 
-@router.get("/{tender_id}", response_model=TenderResponse)
-async def get_tender(
-    tender_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    result = await db.execute(select(Tender).where(Tender.id == tender_id))
-    tender = result.scalar_one_or_none()
+async def load_tender(db: AsyncSession, tender_id: int) -> Optional[tuple[TenderResponse, bool]]:
+    """(tender with its bids count, whether it is archived), or None."""
+    tender = await find_tender(db, tender_id)
     if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-    if tender.status == "draft" and tender.created_by != current_user.id and current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Access denied")
+        return None
+    archived = isinstance(tender, ArchivedTender)
+    _, BidModel = tender_models(archived)
     count_result = await db.execute(
-        select(func.count()).select_from(Bid).where(Bid.tender_id == tender.id)
+        select(func.count()).select_from(BidModel).where(BidModel.tender_id == tender.id)
     )
     bids_count = count_result.scalar() or 0
-    return TenderResponse(
+    response = TenderResponse(
         id=tender.id,
         title=tender.title,
         description=tender.description,
@@ -82,6 +111,107 @@ async def get_tender(
         created_at=tender.created_at,
         bids_count=bids_count
     )
+    return response, archived
+
+
+async def get_visible_tender(db: AsyncSession, tender_id: int, current_user: User) -> tuple[TenderResponse, bool]:
+    """Cached tender by id; 404 if missing, 403 for other users' drafts."""
+    loaded = await cache.get_or_load("tenders", tender_id, lambda: load_tender(db, tender_id))
+    if not loaded:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    tender, archived = loaded
+    if tender.status == "draft" and tender.created_by != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    return tender, archived
+
+
+@router.get("/{tender_id}", response_model=TenderResponse)
+async def get_tender(
+    tender_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    tender, _ = await get_visible_tender(db, tender_id, current_user)
+    return tender
+
+
+def encode_bid_cursor(amount: float, bid_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{amount!r}|{bid_id}".encode()).decode()
+
+
+def decode_bid_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        amount, bid_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(amount), int(bid_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def ranked_bid(bid, rank: int, bidder: Optional[User] = None, proposal: bool = False) -> RankedBid:
+    return RankedBid(
+        id=bid.id,
+        tender_id=bid.tender_id,
+        bidder_id=bid.bidder_id,
+        amount=bid.amount,
+        proposal=bid.proposal if proposal else None,
+        status=bid.status,
+        created_at=bid.created_at,
+        rank=rank,
+        bidder=UserResponse.model_validate(bidder) if bidder is not None else None,
+    )
+
+
+@router.get("/{tender_id}/detail", response_model=TenderDetailResponse, response_model_exclude_none=True)
+async def get_tender_detail(
+    tender_id: int,
+    include_proposal: bool = False,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page of bids"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly)
+):
+    """
+    Tender page in one request: the tender, the caller's bid with its rank and,
+    for admins, a page of bids ranked by amount with their bidders. Bid
+    proposals are only returned with ?include_proposal=true.
+    """
+    tender, archived = await get_visible_tender(db, tender_id, current_user)
+    _, BidModel = tender_models(archived)
+    other = aliased(BidModel)
+    # Equal amounts share a place, as in /bids/my/overview
+    rank = (
+        select(func.count() + 1)
+        .where(other.tender_id == BidModel.tender_id, other.amount < BidModel.amount)
+        .scalar_subquery()
+        .label("rank")
+    )
+    columns = () if include_proposal else (defer(BidModel.proposal),)
+    result = await db.execute(
+        select(BidModel, rank)
+        .options(*columns)
+        .where(BidModel.tender_id == tender_id, BidModel.bidder_id == current_user.id)
+    )
+    row = result.first()
+    my_bid = ranked_bid(row[0], row.rank, proposal=include_proposal) if row else None
+    if current_user.role != "admin":
+        return TenderDetailResponse(tender=tender, my_bid=my_bid)
+
+    query = (
+        select(BidModel, User, rank)
+        .options(*columns)
+        .outerjoin(User, User.id == BidModel.bidder_id)
+        .where(BidModel.tender_id == tender_id)
+    )
+    if cursor:
+        amount, bid_id = decode_bid_cursor(cursor)
+        query = query.where(or_(
+            BidModel.amount > amount,
+            and_(BidModel.amount == amount, BidModel.id > bid_id),
+        ))
+    rows = (await db.execute(query.order_by(BidModel.amount, BidModel.id).limit(limit + 1))).all()
+    bids = [ranked_bid(bid, bid_rank, bidder, include_proposal) for bid, bidder, bid_rank in rows[:limit]]
+    next_cursor = encode_bid_cursor(bids[-1].amount, bids[-1].id) if len(rows) > limit else None
+    return TenderDetailResponse(tender=tender, my_bid=my_bid, bids=bids, next_cursor=next_cursor)
 
 
 @router.post("", response_model=TenderResponse)
@@ -98,6 +228,8 @@ async def create_tender(
     db.add(tender)
     await db.flush()
     await db.refresh(tender)
+    await cache.invalidate(db, "tenders")
+    audit.record(db, current_user, "tender.create", "tender", tender.id, title=tender.title)
     return TenderResponse(
         id=tender.id,
         title=tender.title,
@@ -128,6 +260,8 @@ async def update_tender(
         setattr(tender, key, value)
     await db.flush()
     await db.refresh(tender)
+    await cache.invalidate(db, "tenders")
+    audit.record(db, current_user, "tender.update", "tender", tender.id, changes=update_data)
     count_result = await db.execute(
         select(func.count()).select_from(Bid).where(Bid.tender_id == tender.id)
     )
@@ -158,12 +292,16 @@ async def publish_tender(
         raise HTTPException(status_code=404, detail="Tender not found")
     tender.status = "bidding"
     await db.flush()
+    await cache.invalidate(db, "tenders")
+    enqueue(db, "tender_published", tender_id=tender.id)
+    audit.record(db, current_user, "tender.publish", "tender", tender.id)
     return {"message": "Tender published", "status": "bidding"}
 
 
 @router.delete("/{tender_id}")
 async def delete_tender(
     tender_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
@@ -171,6 +309,18 @@ async def delete_tender(
     tender = result.scalar_one_or_none()
     if not tender:
         raise HTTPException(status_code=404, detail="Tender not found")
+    blobs_result = await db.execute(
+        select(Attachment.sha256).where(
+            (Attachment.tender_id == tender_id)
+            | Attachment.bid_id.in_(select(Bid.id).where(Bid.tender_id == tender_id))
+        )
+    )
+    await invalidate_scores(db, tender_id)
+    await db.execute(delete(BidAnomaly).where(BidAnomaly.tender_id == tender_id))
+    await db.execute(delete(TenderBidProfile).where(TenderBidProfile.tender_id == tender_id))
     await db.delete(tender)
     await db.flush()
+    await cache.invalidate(db, "tenders")
+    audit.record(db, current_user, "tender.delete", "tender", tender_id, title=tender.title)
+    background_tasks.add_task(release_blobs, list(blobs_result.scalars()))
     return {"message": "Tender deleted"}
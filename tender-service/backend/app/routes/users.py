@@ -1,24 +1,86 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 
-from app.database import get_db
-from app.models import User
-from app.schemas import UserResponse, UserUpdate
-from app.auth import get_current_admin
+from app.audit import audit
+from app.cache import cache
+from app.database import get_db, get_read_db
+from app.models import User, UserCount, UserRole
+from app.schemas import UserPage, UserResponse, UserUpdate
+from app.auth import get_current_admin, get_current_admin_readonly
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("", response_model=list[UserResponse])
+# Each ends with id in the same direction, so the matching index serves the whole ORDER BY
+SORTS = {
+    "-created_at": (User.created_at.desc(), User.id.desc()),
+    "created_at": (User.created_at, User.id),
+    "email": (func.lower(User.email), User.id),
+    "full_name": (User.full_name, User.id),
+    "company": (User.company, User.id),
+}
+
+
+def prefix_match(column, prefix: str):
+    """column starts with prefix, as a range an index can serve (LIKE would scan)."""
+    return (column >= prefix) & (column < prefix + "\U0010ffff")
+
+
+async def load_user_counts(db: AsyncSession) -> dict[tuple[str, bool], int]:
+    result = await db.execute(select(UserCount.role, UserCount.is_active, UserCount.count))
+    return {(role, is_active): count for role, is_active, count in result.all()}
+
+
+@router.get("", response_model=UserPage)
 async def list_users(
-    skip: int = 0,
-    limit: int = 50,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    email: Optional[str] = Query(None, description="Email prefix, case-insensitive"),
+    name: Optional[str] = Query(None, description="Full name prefix"),
+    company: Optional[str] = Query(None, description="Company prefix"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort: str = "-created_at",
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_readonly)
 ):
-    result = await db.execute(select(User).offset(skip).limit(limit))
-    return result.scalars().all()
+    """
+    Users page with the total matching role / is_active. The total comes from
+    the user_counts table (cached), so it is omitted when searching by text.
+    """
+    if role is not None and role not in {r.value for r in UserRole}:
+        raise HTTPException(status_code=400, detail="Invalid role")
+    if sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"Sort must be one of: {', '.join(SORTS)}")
+    query = select(User)
+    if email:
+        query = query.where(prefix_match(func.lower(User.email), email.lower()))
+    if name:
+        query = query.where(prefix_match(User.full_name, name))
+    if company:
+        query = query.where(prefix_match(User.company, company))
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    result = await db.execute(query.order_by(*SORTS[sort]).offset(skip).limit(limit + 1))
+    users = result.scalars().all()
+
+    total = None
+    if not (email or name or company):
+        counts = await cache.get_or_load("user_counts", "all", lambda: load_user_counts(db))
+        total = sum(
+            count for (r, active), count in counts.items()
+            if (role is None or r == role) and (is_active is None or active == is_active)
+        )
+    return UserPage(
+        items=[UserResponse.model_validate(u) for u in users[:limit]],
+        total=total,
+        has_more=len(users) > limit,
+    )
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
@@ -37,4 +99,8 @@ async def update_user(
         setattr(user, key, value)
     await db.flush()
     await db.refresh(user)
+    await cache.invalidate(db, "users")
+    if "is_active" in update_data:
+        await cache.invalidate(db, "user_counts")
+    audit.record(db, current_user, "user.update", "user", user.id, changes=update_data)
     return user
@@ -31,6 +31,12 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserPage(BaseModel):
+    items: list[UserResponse]
+    total: Optional[int] = None  # users matching role / is_active; None when searching
+    has_more: bool
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -70,6 +76,20 @@ class TenderResponse(TenderBase):
         from_attributes = True
 
 
+class TenderListItem(BaseModel):
+    """Tender in list responses; only the requested fields are set (?fields=)."""
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    budget: Optional[float] = None
+    status: Optional[str] = None
+    deadline: Optional[datetime] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    bids_count: Optional[int] = None
+
+
 # Bid schemas
 class BidBase(BaseModel):
     amount: float
@@ -102,3 +122,140 @@ class BidWithBidder(BidResponse):
 
     class Config:
         from_attributes = True
+
+
+class BidListItem(BaseModel):
+    """Bid in list responses; only the requested fields are set (?fields=)."""
+    id: int
+    tender_id: Optional[int] = None
+    bidder_id: Optional[int] = None
+    amount: Optional[float] = None
+    proposal: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    bidder: Optional[UserResponse] = None
+
+
+class RankedBid(BidResponse):
+    """Bid with its place among the tender's bids (1 = lowest amount)."""
+    proposal: Optional[str] = None  # only with ?include_proposal=true
+    rank: int
+    bidder: Optional[UserResponse] = None
+
+
+class TenderDetailResponse(BaseModel):
+    """Everything the tender page needs: the tender, the caller's bid, and a page of bids for admins."""
+    tender: TenderResponse
+    my_bid: Optional[RankedBid] = None
+    bids: Optional[list[RankedBid]] = None
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page of bids
+
+
+class TenderSummary(BaseModel):
+    id: int
+    title: str
+    category: str
+    budget: float
+    status: str
+    deadline: datetime
+
+
+class MyBidItem(BaseModel):
+    """Caller's bid with its tender and current place (1 = lowest amount)."""
+    id: int
+    amount: float
+    proposal: Optional[str] = None
+    status: str
+    created_at: datetime
+    rank: int
+    bids_count: int
+    tender: TenderSummary
+
+
+class MyBidsPage(BaseModel):
+    items: list[MyBidItem]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
+
+
+class EvaluationRequest(BaseModel):
+    """Weights per criterion (see app.scoring); omitted = defaults."""
+    weights: Optional[dict[str, float]] = None
+    normalization: str = "minmax"
+    limit: int = 10
+
+
+class ScoredBid(BaseModel):
+    rank: int
+    bid_id: int
+    bidder_id: int
+    amount: float
+    score: float
+    criteria: dict[str, float]
+
+
+class EvaluationResponse(BaseModel):
+    tender_id: int
+    bids_total: int
+    weights: dict[str, float]
+    normalization: str
+    shortlist: list[ScoredBid]
+
+
+# Anomaly report schemas
+class AnomalyResponse(BaseModel):
+    id: int
+    tender_id: int
+    tender_title: Optional[str] = None
+    kind: str
+    score: float
+    details: dict
+    detected_at: datetime
+
+
+# Attachment schemas
+class AttachmentResponse(BaseModel):
+    id: int
+    tender_id: Optional[int] = None
+    bid_id: Optional[int] = None
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    uploaded_by: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Audit log schemas
+class AuditEventResponse(BaseModel):
+    id: int
+    actor_id: Optional[int] = None
+    actor_email: Optional[str] = None
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+    details: dict
+    created_at: datetime
+
+
+# Profiler schemas
+class ProfileStart(BaseModel):
+    """Profile `percent` of requests, only those matching `route` if given."""
+    route: Optional[str] = None  # path template, e.g. "/api/tenders/{tender_id}"
+    percent: float = 100.0
+    duration: float = 30.0  # seconds
+
+
+class ProfileSessionResponse(BaseModel):
+    id: str
+    route: Optional[str] = None
+    percent: float
+    duration: float
+    started_at: datetime
+    active: bool
+    requests: int
+    samples: int
+    interval: float
+    seconds_by_category: dict[str, float]
@@ -0,0 +1,178 @@
+"""
+Multi-criteria bid evaluation.
+
+A tender's bids are loaded column by column into NumPy arrays. Every
+criterion is computed for all bids at once, normalized so that 1 is best,
+and combined with configurable weights into a single score.
+
+Criteria:
+- price:           savings against the tender budget, 1 - amount / budget
+- competitiveness: lowest amount among the bids divided by this amount
+- experience:      log of the bidder's bids on other tenders
+- win_rate:        bidder's accepted / decided bids elsewhere (Laplace-smoothed)
+
+A tender's bid columns are cached under its id in one of SCORE_BUCKETS
+"bid_scores:<n>" namespaces, so a new bid drops a single namespace and the
+number of namespaces stays fixed. Bidder history is loaded per request: any
+bid write elsewhere can change it, and tracking that would make one write
+invalidate every tender its bidder took part in. Weights, normalization and
+budget are applied per request.
+"""
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cache
+from app.models import Bid
+
+CRITERIA = ("price", "competitiveness", "experience", "win_rate")
+DEFAULT_WEIGHTS = {"price": 0.5, "competitiveness": 0.2, "experience": 0.1, "win_rate": 0.2}
+NORMALIZATIONS = ("minmax", "rank", "zscore")
+SCORE_BUCKETS = 64
+
+
+@dataclass
+class Ranking:
+    """Bids of one tender ordered best first, with per-criterion values."""
+    bid_ids: np.ndarray
+    bidder_ids: np.ndarray
+    amounts: np.ndarray
+    scores: np.ndarray
+    criteria: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.bid_ids)
+
+
+def normalize(values: np.ndarray, method: str) -> np.ndarray:
+    if len(values) == 0:
+        return values
+    if method == "rank":
+        distinct, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+        if len(distinct) == 1:
+            return np.ones(len(values))
+        # Tied values share the mean of the ranks they span, so load order does not matter
+        first = np.cumsum(counts) - counts
+        return (first + (counts - 1) / 2)[inverse] / (len(values) - 1)
+    if method == "zscore":
+        std = values.std()
+        return (values - values.mean()) / std if std > 0 else np.zeros(len(values))
+    spread = values.max() - values.min()
+    return (values - values.min()) / spread if spread > 0 else np.ones(len(values))
+
+
+def score_bids(
+    bid_ids: np.ndarray,
+    bidder_ids: np.ndarray,
+    amounts: np.ndarray,
+    budget: float,
+    history: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    weights: dict[str, float],
+    normalization: str = "minmax",
+) -> Ranking:
+    """
+    Score and rank bids. history holds bidder ids (sorted) with their total,
+    won and decided bid counts on other tenders.
+    """
+    hist_ids, hist_total, hist_won, hist_decided = history
+    total = np.zeros(len(bidder_ids))
+    won = np.zeros(len(bidder_ids))
+    decided = np.zeros(len(bidder_ids))
+    if len(hist_ids):
+        pos = np.searchsorted(hist_ids, bidder_ids)
+        pos = np.minimum(pos, len(hist_ids) - 1)
+        found = hist_ids[pos] == bidder_ids
+        total[found] = hist_total[pos[found]]
+        won[found] = hist_won[pos[found]]
+        decided[found] = hist_decided[pos[found]]
+
+    safe_amounts = np.where(amounts > 0, amounts, np.nan)
+    raw = {
+        "price": 1.0 - amounts / budget if budget else np.zeros(len(amounts)),
+        "competitiveness": np.nan_to_num(np.nanmin(safe_amounts) / safe_amounts) if len(amounts) else amounts,
+        "experience": np.log1p(total),
+        "win_rate": (won + 1.0) / (decided + 2.0),
+    }
+    criteria = {name: normalize(raw[name].astype(float), normalization) for name in CRITERIA}
+
+    # Scale by the largest weight first, so huge weights cannot overflow the sum
+    largest = max(weights.values(), default=0.0) or 1.0
+    weights = {name: weight / largest for name, weight in weights.items()}
+    weight_sum = sum(weights.values()) or 1.0
+    scores = np.zeros(len(amounts))
+    for name, weight in weights.items():
+        scores += weight * criteria[name]
+    scores /= weight_sum
+
+    # Best score first, cheaper bid wins ties
+    order = np.lexsort((amounts, -scores))
+    return Ranking(
+        bid_ids=bid_ids[order],
+        bidder_ids=bidder_ids[order],
+        amounts=amounts[order],
+        scores=scores[order],
+        criteria={name: values[order] for name, values in criteria.items()},
+    )
+
+
+async def load_bid_columns(db: AsyncSession, tender_id: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    result = await db.execute(
+        select(Bid.id, Bid.bidder_id, Bid.amount).where(Bid.tender_id == tender_id)
+    )
+    rows = result.all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    ids, bidders, amounts = zip(*rows)
+    return (
+        np.fromiter(ids, dtype=np.int64, count=len(rows)),
+        np.fromiter(bidders, dtype=np.int64, count=len(rows)),
+        np.fromiter(amounts, dtype=float, count=len(rows)),
+    )
+
+
+async def load_bidder_history(db: AsyncSession, tender_id: int):
+    """Per-bidder counts on other tenders, for the bidders of this tender."""
+    result = await db.execute(
+        select(
+            Bid.bidder_id,
+            func.count(),
+            func.sum(case((Bid.status == "accepted", 1), else_=0)),
+            func.sum(case((Bid.status.in_(("accepted", "rejected")), 1), else_=0)),
+        )
+        .where(
+            Bid.bidder_id.in_(select(Bid.bidder_id).where(Bid.tender_id == tender_id)),
+            Bid.tender_id != tender_id,
+        )
+        .group_by(Bid.bidder_id)
+        .order_by(Bid.bidder_id)
+    )
+    rows = result.all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    columns = np.array(rows, dtype=np.int64)
+    return columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+
+
+def scores_namespace(tender_id: int) -> str:
+    return f"bid_scores:{tender_id % SCORE_BUCKETS}"
+
+
+async def evaluate_tender(
+    db: AsyncSession,
+    tender_id: int,
+    budget: float,
+    weights: dict[str, float],
+    normalization: str,
+) -> Ranking:
+    bid_ids, bidder_ids, amounts = await cache.get_or_load(
+        scores_namespace(tender_id), tender_id, lambda: load_bid_columns(db, tender_id)
+    )
+    history = await load_bidder_history(db, tender_id)
+    return score_bids(bid_ids, bidder_ids, amounts, budget, history, weights, normalization)
+
+
+async def invalidate_scores(db: AsyncSession, tender_id: int):
+    """Drop the cached bid columns of a tender whose bids were added or removed."""
+    await cache.invalidate(db, scores_namespace(tender_id))
@@ -0,0 +1,169 @@
+"""
+Content-addressed storage for attachment files.
+Blobs are keyed by the SHA-256 of their content, so identical uploads are
+stored once. Data is always processed in chunks and never held in memory.
+
+An upload is staged by save(), and published under its hash only after the
+attachment row referring to it has been committed. delete() is given a
+callback that re-counts references after the blob has been moved aside, and
+puts it back if a concurrent upload of the same content committed a row in the
+meantime. Together these keep garbage collection from removing a blob that a
+new attachment deduplicated onto.
+"""
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import anyio
+
+from app import database
+from app.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Upload exceeded the configured size limit."""
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    staged_path: Optional[Path] = None  # where save() left the data until publish()
+
+
+class StorageBackend:
+    """Interface for blob storage. Subclasses may keep data anywhere."""
+
+    async def save(self, chunks: AsyncIterator[bytes], max_size: Optional[int] = None) -> StoredBlob:
+        """Stage uploaded data; it is not readable by hash until publish()."""
+        raise NotImplementedError
+
+    async def publish(self, blob: StoredBlob) -> None:
+        """Make a staged blob available under its hash (a no-op for known content)."""
+        raise NotImplementedError
+
+    async def discard(self, blob: StoredBlob) -> None:
+        """Drop a staged blob that will not be published."""
+        raise NotImplementedError
+
+    async def iter_range(self, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes start..end (inclusive) of a blob."""
+        raise NotImplementedError
+        yield b""
+
+    async def delete(self, sha256: str, is_referenced: Callable[[], Awaitable[bool]]) -> None:
+        """Delete a blob unless is_referenced(), checked once the blob is out of reach, says otherwise."""
+        raise NotImplementedError
+
+    def local_path(self, sha256: str) -> Optional[Path]:
+        """Filesystem path of a blob, if the backend has one (enables zero-copy sends)."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """
+    Blobs as files under root/ab/cd/<sha256>. Each organization gets its own
+    root (base/<org>), since blobs are reference-counted per database.
+    """
+
+    def __init__(self, base: str):
+        self.base = Path(base)
+
+    @property
+    def root(self) -> Path:
+        tenant = database.current_tenant.get()
+        return self.base if tenant is None else self.base / tenant
+
+    def _path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def local_path(self, sha256: str) -> Optional[Path]:
+        return self._path(sha256)
+
+    async def save(self, chunks: AsyncIterator[bytes], max_size: Optional[int] = None) -> StoredBlob:
+        tmp_dir = self.root / "tmp"
+        await anyio.to_thread.run_sync(lambda: tmp_dir.mkdir(parents=True, exist_ok=True))
+        tmp_path = tmp_dir / uuid.uuid4().hex
+        hasher = hashlib.sha256()
+        size = 0
+        buffer = bytearray()  # request chunks are small; write CHUNK_SIZE at a time
+        try:
+            async with await anyio.open_file(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UploadTooLarge(f"File exceeds {max_size} bytes")
+                    hasher.update(chunk)
+                    buffer += chunk
+                    if len(buffer) >= CHUNK_SIZE:
+                        await f.write(buffer)
+                        buffer.clear()
+                if buffer:
+                    await f.write(buffer)
+        except BaseException:
+            await anyio.to_thread.run_sync(lambda: tmp_path.unlink(missing_ok=True))
+            raise
+        return StoredBlob(sha256=hasher.hexdigest(), size=size, staged_path=tmp_path)
+
+    async def publish(self, blob: StoredBlob) -> None:
+        await anyio.to_thread.run_sync(self._commit, blob.staged_path, self._path(blob.sha256))
+
+    async def discard(self, blob: StoredBlob) -> None:
+        await anyio.to_thread.run_sync(lambda: blob.staged_path.unlink(missing_ok=True))
+
+    @staticmethod
+    def _commit(tmp_path: Path, final_path: Path) -> None:
+        if final_path.exists():
+            tmp_path.unlink(missing_ok=True)
+            return  # deduplicated: same content already stored
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    async def iter_range(self, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+        remaining = end - start + 1
+        async with await anyio.open_file(self._path(sha256), "rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, sha256: str, is_referenced: Callable[[], Awaitable[bool]]) -> None:
+        path = self._path(sha256)
+        trash_dir = self.root / "trash"
+        trash_path = trash_dir / uuid.uuid4().hex
+
+        def move_aside() -> bool:
+            trash_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(path, trash_path)
+            except FileNotFoundError:
+                return False
+            return True
+
+        if not await anyio.to_thread.run_sync(move_aside):
+            return
+        try:
+            referenced = await is_referenced()
+        except BaseException:
+            referenced = True
+            raise
+        finally:
+            if referenced:
+                # A concurrent upload found the blob and committed its row: put it back.
+                # If that upload already wrote a fresh copy, this replaces identical bytes.
+                await anyio.to_thread.run_sync(os.replace, trash_path, path)
+            else:
+                await anyio.to_thread.run_sync(lambda: trash_path.unlink(missing_ok=True))
+
+
+storage: StorageBackend = LocalStorage(settings.STORAGE_DIR)
@@ -0,0 +1,42 @@
+"""
+Follow-up work of API routes, run by the job queue (app/jobs.py) after the
+request's transaction commits.
+"""
+import logging
+
+from sqlalchemy import func, select
+
+from app import database
+from app.anomalies import run_detection
+from app.jobs import job
+from app.models import Tender, User
+
+logger = logging.getLogger(__name__)
+
+
+@job("tender_published")
+async def tender_published(payload: dict):
+    # No mail transport yet: record who would be notified
+    async with database.AsyncSessionLocal() as db:
+        tender = await db.get(Tender, payload["tender_id"])
+        if tender is None or tender.status != "bidding":
+            return
+        result = await db.execute(
+            select(func.count()).select_from(User).where(User.is_active.is_(True), User.role == "user")
+        )
+        logger.info("Tender %d %r published, %d bidders to notify", tender.id, tender.title, result.scalar())
+
+
+@job("bid_status_changed", concurrency=1)
+async def bid_status_changed(payload: dict):
+    # An accepted bid awards the tender, which changes the bid rotation profiles
+    if payload["status"] == "accepted":
+        await run_detection(database.AsyncSessionLocal)
+
+
+@job("user_registered")
+async def user_registered(payload: dict):
+    async with database.AsyncSessionLocal() as db:
+        user = await db.get(User, payload["user_id"])
+        if user is not None:
+            logger.info("User %d <%s> registered (company: %s)", user.id, user.email, user.company or "-")
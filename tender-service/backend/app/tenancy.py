@@ -0,0 +1,221 @@
+"""
+Multi-tenant hosting: one database per organization.
+
+Enabled with MULTI_TENANT. The main database (DATABASE_URL) then only holds
+the organizations table. Each organization's tenders, bids and users live in
+its own database, by default a SQLite file built from TENANT_DATABASE_URL. An
+organization is provisioned and migrated with scripts/tenants.py.
+
+TenantMiddleware resolves the organization of every /api request from the
+"org" claim of the bearer token or, before login, from the X-Organization
+header or the host name (<org>.TENANT_BASE_DOMAIN). It then sets
+database.current_tenant for the request; a request naming no organization is
+rejected, since the main database only holds the registry. Engines are
+opened on first use. A background loop closes the engines of organizations
+without requests for TENANT_IDLE_TIMEOUT seconds, unless they still have
+queued jobs, and evicts organizations deactivated since they were loaded.
+"""
+import asyncio
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import database
+from app.cache import cache
+from app.config import settings
+from app.models import Job, JobStatus, Organization
+
+logger = logging.getLogger(__name__)
+
+SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+ORGANIZATION_HEADER = "x-organization"  # picks the organization at login without a base domain
+
+
+def database_url_for(slug: str) -> str:
+    return settings.TENANT_DATABASE_URL.format(org=slug)
+
+
+async def load_organizations() -> int:
+    """Register the database URLs of all active organizations."""
+    with database.use_tenant(None):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Organization.slug, Organization.database_url).where(Organization.is_active.is_(True))
+            )
+            rows = result.all()
+    for slug, url in rows:
+        database.tenant_databases.register(slug, url)
+    return len(rows)
+
+
+async def resolve(slug: str) -> bool:
+    """Whether slug is an active organization; looks up ones created since startup."""
+    if database.tenant_databases.is_registered(slug):
+        return True
+    if not SLUG_PATTERN.match(slug):
+        return False
+    with database.use_tenant(None):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Organization.database_url)
+                .where(Organization.slug == slug, Organization.is_active.is_(True))
+            )
+            url = result.scalar_one_or_none()
+    if url is None:
+        return False
+    database.tenant_databases.register(slug, url)
+    return True
+
+
+def tenant_from_token(authorization: str) -> Optional[str]:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("org")
+
+
+def tenant_from_host(host: str) -> Optional[str]:
+    host = host.split(":", 1)[0].lower()
+    suffix = "." + settings.TENANT_BASE_DOMAIN.lower()
+    if not settings.TENANT_BASE_DOMAIN or not host.endswith(suffix):
+        return None
+    slug = host[:-len(suffix)]
+    return slug if "." not in slug else None
+
+
+class TenantMiddleware:
+    """
+    Sets database.current_tenant for /api requests. A request without an
+    organization is a 400; an unknown or deactivated one is a 404.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        slug = (
+            tenant_from_token(headers.get("authorization", ""))
+            or headers.get(ORGANIZATION_HEADER, "").strip().lower()
+            or tenant_from_host(headers.get("host", ""))
+        )
+        if not slug:
+            await JSONResponse({"detail": "Organization required"}, status_code=400)(scope, receive, send)
+            return
+        if not await resolve(slug):
+            await JSONResponse({"detail": "Unknown organization"}, status_code=404)(scope, receive, send)
+            return
+        database.tenant_databases.touch(slug)
+        with database.use_tenant(slug):
+            await self.app(scope, receive, send)
+
+
+async def close_idle(timeout: float) -> list[str]:
+    closed = []
+    for slug in database.tenant_databases.idle_tenants(timeout):
+        with database.use_tenant(slug):
+            async with database.AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(func.count()).select_from(Job).where(Job.status != JobStatus.FAILED.value)
+                )
+                queued = result.scalar()
+        if queued:
+            continue
+        await database.tenant_databases.close(slug)
+        cache.drop(slug)
+        closed.append(slug)
+    return closed
+
+
+async def evict(slug: str):
+    """Close a deactivated organization's engines and forget it and its cache."""
+    await database.tenant_databases.unregister(slug)
+    cache.drop(slug)
+
+
+async def evict_deactivated() -> list[str]:
+    """Evict registered organizations that are no longer active in the main database."""
+    registered = database.tenant_databases.registered_tenants()
+    if not registered:
+        return []
+    with database.use_tenant(None):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Organization.slug)
+                .where(Organization.slug.in_(registered), Organization.is_active.is_(True))
+            )
+            active = set(result.scalars())
+    evicted = [slug for slug in registered if slug not in active]
+    for slug in evicted:
+        await evict(slug)
+    return evicted
+
+
+async def close_idle_loop():
+    interval = min(60.0, settings.TENANT_IDLE_TIMEOUT / 2)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await evict_deactivated()
+            await close_idle(settings.TENANT_IDLE_TIMEOUT)
+        except Exception:
+            logger.exception("Closing idle organization databases failed")
+
+
+async def migrate(slug: str):
+    """Create the organization's database if needed and bring its schema up to date."""
+    url = make_url(database.tenant_databases.get(slug).url)
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+    with database.use_tenant(slug):
+        await database.init_db()
+
+
+async def provision(slug: str, name: str, database_url: Optional[str] = None) -> Organization:
+    if not SLUG_PATTERN.match(slug):
+        raise ValueError("Organization slug must be lowercase letters, digits and dashes")
+    with database.use_tenant(None):
+        async with database.AsyncSessionLocal() as db:
+            existing = await db.execute(select(Organization).where(Organization.slug == slug))
+            if existing.scalar_one_or_none() is not None:
+                raise ValueError(f"Organization {slug} already exists")
+            organization = Organization(
+                slug=slug,
+                name=name,
+                database_url=database_url or database_url_for(slug),
+                created_at=datetime.utcnow(),
+            )
+            db.add(organization)
+            await db.commit()
+    database.tenant_databases.register(slug, organization.database_url)
+    await migrate(slug)
+    return organization
+
+
+async def set_active(slug: str, active: bool) -> Organization:
+    with database.use_tenant(None):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(select(Organization).where(Organization.slug == slug))
+            organization = result.scalar_one_or_none()
+            if organization is None:
+                raise ValueError(f"Unknown organization: {slug}")
+            organization.is_active = active
+            await db.commit()
+    if not active:
+        await evict(slug)
+    return organization
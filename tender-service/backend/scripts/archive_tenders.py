@@ -0,0 +1,29 @@
+"""
+Move old closed tenders into the archive tables. Run: python -m scripts.archive_tenders [--days N]
+
+Awarded and cancelled tenders untouched for ARCHIVE_AFTER_DAYS (or N) days are
+moved with their bids in batches of ARCHIVE_BATCH_SIZE. Safe to run while the
+API is serving requests.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.archive import archive_closed_tenders
+from app.config import settings
+from app.database import AsyncSessionLocal, init_db
+
+
+async def main():
+    days = settings.ARCHIVE_AFTER_DAYS
+    if "--days" in sys.argv[1:]:
+        days = int(sys.argv[sys.argv.index("--days") + 1])
+    await init_db()
+    stats = await archive_closed_tenders(AsyncSessionLocal, days, settings.ARCHIVE_BATCH_SIZE)
+    print(f"Archived {stats.tenders} tenders and {stats.bids} bids closed more than {days} days ago")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Read throughput benchmark. Run: python -m scripts.bench_reads [requests] [concurrency]
+
+Seeds a temporary SQLite database and fires GET requests at the ASGI app,
+first with GET routes forced back onto the committing write session
+(get_db), then with the read-only session (get_read_db). Prints requests/sec
+for a mixed run and for each endpoint separately.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_tmpdir.name, 'bench.db')}"
+os.environ["LICENSE_SERVER_URL"] = ""
+
+import httpx
+
+from app.auth import (
+    get_current_user,
+    get_current_admin,
+    get_current_user_readonly,
+    get_current_admin_readonly,
+    get_password_hash,
+)
+from app.database import AsyncSessionLocal, engine, read_engine, get_db, get_read_db, init_db
+from app.main import app
+from app.models import Bid, Tender, User
+
+USERS = 50
+TENDERS = 500
+BIDS_PER_TENDER = 20
+URLS = [
+    "/api/tenders",
+    "/api/tenders?status=bidding",
+    "/api/tenders/1",
+    "/api/bids/my",
+    "/api/auth/me",
+]
+
+
+async def seed():
+    await init_db()
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        password = get_password_hash("password")
+        for i in range(USERS):
+            db.add(User(email=f"user{i}@example.com", hashed_password=password,
+                        full_name=f"User {i}", role="user"))
+        await db.flush()
+        for i in range(TENDERS):
+            db.add(Tender(title=f"Tender {i}", description="x" * 500, category="IT",
+                          budget=1_000_000.0, status="bidding", deadline=now + timedelta(days=30),
+                          created_by=1, created_at=now - timedelta(minutes=i)))
+        await db.flush()
+        for t in range(1, TENDERS + 1):
+            for b in range(BIDS_PER_TENDER):
+                db.add(Bid(tender_id=t, bidder_id=1 + (t + b) % USERS,
+                           amount=1000.0 + b, proposal="y" * 500))
+        await db.commit()
+
+
+async def run(client: httpx.AsyncClient, headers: dict, urls: list[str], total: int, concurrency: int) -> float:
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(urls[i % len(urls)])
+
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(total: int, concurrency: int):
+    await seed()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/api/auth/login", data={"username": "user0@example.com", "password": "password"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await run(client, headers, URLS, len(URLS) * 4, 1)  # warm up pools and caches
+
+        print(f"{total} GET requests per run, concurrency {concurrency}")
+        print(f"  {'':28} {'write (commit)':>16} {'read-only':>12}")
+        for label, urls in [("mixed", URLS)] + [(url, [url]) for url in URLS]:
+            app.dependency_overrides = {
+                get_read_db: get_db,
+                get_current_user_readonly: get_current_user,
+                get_current_admin_readonly: get_current_admin,
+            }
+            write_rps = await run(client, headers, urls, total, concurrency)
+            app.dependency_overrides = {}
+            read_rps = await run(client, headers, urls, total, concurrency)
+            gain = (read_rps / write_rps - 1) * 100
+            print(f"  {label:28} {write_rps:12.1f} r/s {read_rps:8.1f} r/s  {gain:+6.1f}%")
+
+    await engine.dispose()
+    await read_engine.dispose()
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(total, concurrency))
+    _tmpdir.cleanup()
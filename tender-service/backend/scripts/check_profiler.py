@@ -0,0 +1,124 @@
+"""
+Profiler attribution check. Run: python -m scripts.check_profiler
+
+Profiles requests that spend their time in the database and exits with status
+1 if a sample of them is missed or most of their samples are not attributed
+to the sqlalchemy category:
+- a request awaiting a slow query (suspended, await chain down to aiosqlite);
+- the same query awaited inside an async generator (async for);
+- a request loading many ORM rows, which SQLAlchemy runs in a greenlet whose
+  frames do not link back to the request's coroutine.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_tmpdir.name, 'profiler.db')}"
+os.environ["LICENSE_SERVER_URL"] = ""
+
+import httpx
+from sqlalchemy import insert, select, text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.database import AsyncSessionLocal, engine, init_db
+from app.models import Tender
+from app.profiling import ProfileSession, ProfilingMiddleware, profiler
+
+TENDERS = 20000
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3000000) "
+    "SELECT count(*) FROM c"
+)
+MIN_SHARE = 0.8  # of a request's samples that must land in sqlalchemy
+
+
+async def slow_query(request):
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(SLOW_QUERY)
+    return PlainTextResponse(str(count))
+
+
+async def slow_query_in_generator(request):
+    async def counts():
+        async with AsyncSessionLocal() as db:
+            yield await db.scalar(SLOW_QUERY)
+
+    return PlainTextResponse(str([count async for count in counts()]))
+
+
+async def load_rows(request):
+    async with AsyncSessionLocal() as db:
+        tenders = await db.run_sync(lambda session: session.execute(select(Tender)).scalars().all())
+    return PlainTextResponse(str(len(tenders)))
+
+
+app = ProfilingMiddleware(Starlette(routes=[
+    Route("/api/slow-query", slow_query),
+    Route("/api/slow-query-in-generator", slow_query_in_generator),
+    Route("/api/load-rows", load_rows),
+]))
+
+
+async def seed():
+    await init_db()
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Tender), [
+            {
+                "title": f"Tender {i}",
+                "description": "x" * 200,
+                "category": "IT",
+                "budget": 1_000_000.0,
+                "status": "bidding",
+                "deadline": now + timedelta(days=30),
+                "created_by": 1,
+                "created_at": now,
+            }
+            for i in range(TENDERS)
+        ])
+        await db.commit()
+
+
+async def profile(client: httpx.AsyncClient, path: str) -> ProfileSession:
+    session = profiler.start(ProfileSession(route=path, percent=100, duration=60))
+    try:
+        response = await client.get(path)
+        response.raise_for_status()
+    finally:
+        profiler.stop()
+    return session
+
+
+async def main() -> int:
+    await seed()
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        for path in ("/api/slow-query", "/api/slow-query-in-generator", "/api/load-rows"):
+            session = await profile(client, path)
+            share = session.categories["sqlalchemy"] / max(session.samples, 1)
+            ok = session.samples > 0 and not session.missed and share >= MIN_SHARE
+            failures += not ok
+            print(
+                f"{'ok  ' if ok else 'FAIL'} {path}: {session.samples} samples, "
+                f"{session.missed} missed, {share:.0%} sqlalchemy"
+            )
+            if not ok:
+                for line in session.collapsed().splitlines()[:5]:
+                    print("    ", line[-200:])
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    code = asyncio.run(main())
+    _tmpdir.cleanup()
+    sys.exit(code)
@@ -0,0 +1,251 @@
+"""
+Query plan regression check. Run: python -m scripts.check_query_plans
+
+Seeds a temporary SQLite database, drives the API routes through the ASGI app,
+captures every SQL statement they issue and runs EXPLAIN QUERY PLAN on it.
+Exits with status 1 if a query over a hot table falls back to a full table
+scan or sorts its result in a temporary B-tree instead of reading an index.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_tmpdir = tempfile.TemporaryDirectory()
+DB_PATH = os.path.join(_tmpdir.name, "plans.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["LICENSE_SERVER_URL"] = ""
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.anomalies import run_detection
+from app.archive import archive_closed_tenders
+from app.database import AsyncSessionLocal, engine, read_engine, init_db
+from app.main import app
+from app.models import Attachment, AuditEvent, Bid, Tender, User
+from app.auth import get_password_hash
+from app.routes.tenders import encode_bid_cursor
+
+# Tables that grow with usage; a full scan over them is a regression.
+HOT_TABLES = (
+    "tenders", "bids", "users", "tenders_archive", "bids_archive",
+    "audit_log", "attachments", "bid_anomalies",
+)
+
+USERS = 200
+TENDERS = 2000
+BIDS_PER_TENDER = 10
+CATEGORIES = ("IT", "Строительство", "Логистика", "Канцтовары", "Услуги")
+STATUSES = ("draft", "bidding", "review", "awarded", "cancelled")
+AUDIT_EVENTS = 20000
+AUDIT_ACTIONS = ("tender.create", "tender.publish", "bid.create", "bid.status", "user.update")
+# Closed tenders past this id are aged and moved to the archive tables.
+ARCHIVE_FROM = TENDERS // 2
+ARCHIVED_TENDER = ARCHIVE_FROM + 4  # an awarded one
+
+
+async def seed():
+    await init_db()
+    password = get_password_hash("password")
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        db.add(User(email="admin@example.com", hashed_password=password,
+                    full_name="Admin", role="admin"))
+        for i in range(USERS):
+            db.add(User(email=f"user{i}@example.com", hashed_password=password,
+                        full_name=f"User {i}", company=f"Company {i % 50}", role="user"))
+        await db.flush()
+        for i in range(TENDERS):
+            db.add(Tender(
+                title=f"Tender {i}",
+                description="x" * 200,
+                category=CATEGORIES[i % len(CATEGORIES)],
+                budget=1_000_000.0,
+                status=STATUSES[i % len(STATUSES)],
+                deadline=now + timedelta(days=30),
+                created_by=1,
+                created_at=now - timedelta(minutes=i),
+                updated_at=now - timedelta(days=365) if i >= ARCHIVE_FROM else now,
+            ))
+        await db.flush()
+        for t in range(1, TENDERS + 1):
+            for b in range(BIDS_PER_TENDER):
+                db.add(Bid(
+                    tender_id=t,
+                    bidder_id=2 + (t * 7 + b) % USERS,
+                    amount=500_000.0 + b * 1000,
+                    proposal="y" * 200,
+                ))
+        await db.flush()
+        await db.execute(insert(Attachment), [
+            {
+                "tender_id": t if b == 0 else None,
+                "bid_id": (t - 1) * BIDS_PER_TENDER + b if b else None,
+                "filename": f"file{t}-{b}.pdf",
+                "content_type": "application/pdf",
+                "size": 1024,
+                "sha256": f"{t:032x}{b:032x}",
+                "uploaded_by": 1,
+            }
+            for t in range(1, TENDERS + 1)
+            for b in range(3)
+        ])
+        await db.execute(insert(AuditEvent), [
+            {
+                "actor_id": 1 + i % (USERS + 1),
+                "action": AUDIT_ACTIONS[i % len(AUDIT_ACTIONS)],
+                "entity_type": AUDIT_ACTIONS[i % len(AUDIT_ACTIONS)].split(".")[0],
+                "entity_id": 1 + i % TENDERS,
+                "details": "{}",
+                "created_at": now - timedelta(seconds=AUDIT_EVENTS - i),
+            }
+            for i in range(AUDIT_EVENTS)
+        ])
+        await db.commit()
+    await run_detection(AsyncSessionLocal, full=True)
+    await archive_closed_tenders(AsyncSessionLocal, older_than_days=30, batch_size=500)
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("ANALYZE")
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    response = await client.post(
+        "/api/auth/login", data={"username": email, "password": "password"}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def exercise_routes(client: httpx.AsyncClient):
+    """Call every read route with the filter combinations the UI uses."""
+    admin = await login(client, "admin@example.com")
+    user = await login(client, "user1@example.com")
+    bid_cursor = encode_bid_cursor(502_000.0, 13)
+    archived_bid = (ARCHIVED_TENDER - 1) * BIDS_PER_TENDER + 1
+    calls = [
+        ("GET", "/api/auth/me", user, None),
+        ("GET", "/api/tenders", user, None),
+        ("GET", "/api/tenders?status=bidding", user, None),
+        ("GET", "/api/tenders?category=IT", user, None),
+        ("GET", "/api/tenders?status=bidding&category=IT", user, None),
+        ("GET", "/api/tenders?include_drafts=true", admin, None),
+        ("GET", "/api/tenders?ids=2,7,12", user, None),
+        ("GET", "/api/tenders?archived=true", user, None),
+        ("GET", "/api/tenders?archived=true&status=awarded", user, None),
+        ("GET", "/api/tenders?archived=true&category=IT", user, None),
+        ("GET", "/api/tenders?archived=true&status=awarded&category=IT", user, None),
+        ("GET", "/api/tenders/2", user, None),
+        ("GET", "/api/tenders/2/detail", user, None),
+        ("GET", "/api/tenders/2/detail", admin, None),
+        ("GET", "/api/tenders/2/detail?limit=3&include_proposal=true", admin, None),
+        ("GET", f"/api/tenders/2/detail?limit=3&cursor={bid_cursor}", admin, None),
+        ("GET", f"/api/tenders/{ARCHIVED_TENDER}", user, None),
+        ("GET", f"/api/tenders/{ARCHIVED_TENDER}/detail", admin, None),
+        ("GET", f"/api/tenders/{ARCHIVED_TENDER}/detail?limit=3&cursor={bid_cursor}", admin, None),
+        ("GET", "/api/bids/tender/2", admin, None),
+        ("GET", f"/api/bids/tender/{ARCHIVED_TENDER}", admin, None),
+        ("GET", "/api/bids/my", user, None),
+        ("GET", "/api/bids/my?archived=true", user, None),
+        ("GET", "/api/bids/my/overview", user, None),
+        ("GET", "/api/bids/my/overview?status=pending&tender_status=bidding&limit=5", user, None),
+        ("GET", "/api/bids/my/overview?archived=true", user, None),
+        ("GET", "/api/bids/my/overview?archived=true&tender_status=awarded&limit=5", user, None),
+        ("POST", "/api/bids", user, {"tender_id": 2, "amount": 1.0, "proposal": "p"}),
+        ("POST", "/api/bids/tender/2/evaluate", admin, {}),
+        ("POST", "/api/bids/tender/7/evaluate", admin, {"normalization": "rank"}),
+        ("GET", "/api/attachments/tender/2", user, None),
+        ("GET", "/api/attachments/bid/12", admin, None),
+        ("GET", f"/api/attachments/tender/{ARCHIVED_TENDER}", admin, None),
+        ("GET", f"/api/attachments/bid/{archived_bid}", admin, None),
+        ("GET", "/api/audit", admin, None),
+        ("GET", "/api/audit?actor_id=3", admin, None),
+        ("GET", "/api/audit?action=bid.create", admin, None),
+        ("GET", "/api/audit?entity_type=tender&entity_id=2", admin, None),
+        ("GET", f"/api/audit?before_id={AUDIT_EVENTS // 2}", admin, None),
+        ("GET", f"/api/audit?actor_id=3&before_id={AUDIT_EVENTS // 2}", admin, None),
+        ("GET", "/api/anomalies", admin, None),
+        ("GET", "/api/anomalies?kind=identical_amounts", admin, None),
+        ("GET", "/api/anomalies?tender_id=2", admin, None),
+        ("GET", "/api/users", admin, None),
+        ("GET", "/api/users?role=user&is_active=true", admin, None),
+        ("GET", "/api/users?is_active=false", admin, None),
+        ("GET", "/api/users?role=admin", admin, None),
+        ("GET", "/api/users?sort=email", admin, None),
+        ("GET", "/api/users?email=user1&sort=email", admin, None),
+        ("GET", "/api/users?company=Company%201&sort=company", admin, None),
+        ("GET", "/api/users?name=User%201&sort=full_name", admin, None),
+    ]
+    for method, url, headers, body in calls:
+        response = await client.request(method, url, headers=headers, json=body)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{method} {url} failed: {response.status_code}")
+
+
+def reads_newest_rows(statement: str, table: str) -> bool:
+    """Unfiltered "newest N" page: SQLite walks the rowid backwards and stops at the limit."""
+    statement = " ".join(statement.split())
+    return " WHERE " not in statement and f"ORDER BY {table}.id DESC LIMIT" in statement
+
+
+def find_problems(conn: sqlite3.Connection, statement: str, parameters) -> list[str]:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        for table in HOT_TABLES:
+            scanned = detail.split(" ")[:2] == ["SCAN", table] and "USING" not in detail
+            if scanned and not reads_newest_rows(statement, table):
+                problems.append(detail)
+        if "USE TEMP B-TREE" in detail and any(t in statement for t in HOT_TABLES):
+            problems.append(detail)
+    return problems
+
+
+async def main() -> int:
+    await seed()
+
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, tuple(parameters or ())))
+
+    engines = {engine.sync_engine, read_engine.sync_engine}  # GET routes use the read engine
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", capture)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await exercise_routes(client)
+    for sync_engine in engines:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+    await engine.dispose()
+    await read_engine.dispose()
+
+    failures = 0
+    seen = set()
+    with sqlite3.connect(DB_PATH) as conn:
+        for statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            problems = find_problems(conn, statement, parameters)
+            if problems:
+                failures += 1
+                print("FAIL:", " ".join(statement.split()))
+                for problem in problems:
+                    print("   ", problem)
+
+    print(f"Checked {len(seen)} distinct queries, {failures} with table scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    code = asyncio.run(main())
+    _tmpdir.cleanup()
+    sys.exit(code)
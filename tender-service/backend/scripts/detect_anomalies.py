@@ -0,0 +1,28 @@
+"""
+Batch anomaly detection over bids. Run: python -m scripts.detect_anomalies [--full]
+
+Without --full only bids created (and tenders changed) since the previous run
+are analysed. Results are served by GET /api/anomalies.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.anomalies import run_detection
+from app.database import AsyncSessionLocal, init_db
+
+
+async def main():
+    full = "--full" in sys.argv[1:]
+    await init_db()
+    stats = await run_detection(AsyncSessionLocal, full=full)
+    print(f"{'Full' if full else 'Incremental'} run: {stats.tenders_analysed} tenders, "
+          f"{stats.bids_analysed} bids analysed (up to bid #{stats.last_bid_id})")
+    for kind, count in sorted(stats.flagged.items()):
+        print(f"  {kind}: {count} flagged")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Organization management for multi-tenant hosting (MULTI_TENANT=true).
+
+    python -m scripts.tenants list
+    python -m scripts.tenants provision <slug> "<name>" <admin-email> <admin-password> [database-url]
+    python -m scripts.tenants migrate [<slug> ...]
+    python -m scripts.tenants deactivate <slug>
+    python -m scripts.tenants activate <slug>
+
+provision registers the organization in the main database, creates its own
+database and its first admin. migrate creates missing tables and indexes in
+the given organizations' databases, or in all of them. A deactivated
+organization's requests get 404; running servers close its database within
+a minute.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from app import tenancy
+from app.auth import get_password_hash
+from app.database import AsyncSessionLocal, init_db, tenant_databases, use_tenant
+from app.models import Organization, User
+
+
+async def list_organizations():
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Organization).order_by(Organization.slug))
+        for org in result.scalars():
+            state = "active" if org.is_active else "disabled"
+            print(f"{org.slug:20} {state:8} {org.name}  ({org.database_url})")
+
+
+async def provision(slug: str, name: str, admin_email: str, admin_password: str, database_url: str = None):
+    organization = await tenancy.provision(slug, name, database_url)
+    with use_tenant(slug):
+        async with AsyncSessionLocal() as db:
+            db.add(User(
+                email=admin_email,
+                hashed_password=get_password_hash(admin_password),
+                full_name="Администратор",
+                company=name,
+                role="admin",
+            ))
+            await db.commit()
+    print(f"Provisioned {slug} ({organization.database_url}), admin {admin_email}")
+
+
+async def migrate(slugs: list[str]):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Organization.slug, Organization.database_url).order_by(Organization.slug))
+        urls = dict(result.all())
+    for slug in slugs or urls:
+        if slug not in urls:
+            raise ValueError(f"Unknown organization: {slug}")
+        tenant_databases.register(slug, urls[slug])
+        await tenancy.migrate(slug)
+        print(f"Migrated {slug}")
+
+
+async def set_active(slug: str, active: bool):
+    await tenancy.set_active(slug, active)
+    print(f"{'Activated' if active else 'Deactivated'} {slug}")
+
+
+async def main(args: list[str]):
+    await init_db()
+    try:
+        if args[:1] == ["list"]:
+            await list_organizations()
+        elif args[:1] == ["provision"] and len(args) in (5, 6):
+            await provision(*args[1:])
+        elif args[:1] == ["migrate"]:
+            await migrate(args[1:])
+        elif args[:1] in (["activate"], ["deactivate"]) and len(args) == 2:
+            await set_active(args[1], args[0] == "activate")
+        else:
+            print(__doc__)
+            sys.exit(2)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        await tenant_databases.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -12,9 +12,25 @@ api.interceptors.request.use((config) => {
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  // Multi-tenant installs without per-organization host names
+  const org = localStorage.getItem('org');
+  if (org) {
+    config.headers['X-Organization'] = org;
+  }
   return config;
 });
 
+// Set VITE_ORGANIZATION_FIELD=true for multi-tenant installs without TENANT_BASE_DOMAIN
+export const askOrganization = import.meta.env.VITE_ORGANIZATION_FIELD === 'true';
+
+export function setOrganization(org: string) {
+  if (org) {
+    localStorage.setItem('org', org.trim().toLowerCase());
+  } else {
+    localStorage.removeItem('org');
+  }
+}
+
 api.interceptors.response.use(
   (response) => response,
   (error) => {
@@ -61,6 +77,34 @@ export interface Bid {
   bidder?: User;
 }
 
+export interface RankedBid extends Omit<Bid, 'proposal'> {
+  proposal?: string;
+  rank: number;
+}
+
+export interface TenderDetail {
+  tender: Tender;
+  my_bid?: RankedBid;
+  bids?: RankedBid[];
+  next_cursor?: string;
+}
+
+export interface MyBid {
+  id: number;
+  amount: number;
+  proposal?: string;
+  status: string;
+  created_at: string;
+  rank: number;
+  bids_count: number;
+  tender: Pick<Tender, 'id' | 'title' | 'category' | 'budget' | 'status' | 'deadline'>;
+}
+
+export interface MyBidsPage {
+  items: MyBid[];
+  next_cursor: string | null;
+}
+
 export const authApi = {
   login: (email: string, password: string) =>
     api.post('/auth/login', new URLSearchParams({ username: email, password }), {
@@ -72,9 +116,11 @@ export const authApi = {
 };
 
 export const tendersApi = {
-  list: (params?: { status?: string; category?: string; include_drafts?: boolean }) =>
+  list: (params?: { status?: string; category?: string; include_drafts?: boolean; fields?: string; ids?: string }) =>
     api.get<Tender[]>('/tenders', { params }),
   get: (id: number) => api.get<Tender>(`/tenders/${id}`),
+  detail: (id: number, params?: { include_proposal?: boolean; cursor?: string; limit?: number }) =>
+    api.get<TenderDetail>(`/tenders/${id}/detail`, { params }),
   create: (data: Partial<Tender>) => api.post<Tender>('/tenders', data),
   update: (id: number, data: Partial<Tender>) => api.patch<Tender>(`/tenders/${id}`, data),
   publish: (id: number) => api.post(`/tenders/${id}/publish`),
@@ -84,14 +130,34 @@ export const tendersApi = {
 export const bidsApi = {
   create: (data: { tender_id: number; amount: number; proposal: string }) =>
     api.post<Bid>('/bids', data),
-  getByTender: (tenderId: number) => api.get<Bid[]>(`/bids/tender/${tenderId}`),
-  getMy: () => api.get<Bid[]>('/bids/my'),
+  getByTender: (tenderId: number, params?: { fields?: string }) =>
+    api.get<Bid[]>(`/bids/tender/${tenderId}`, { params }),
+  getMy: (params?: { fields?: string }) => api.get<Bid[]>('/bids/my', { params }),
+  getMyOverview: (params?: { cursor?: string; status?: string[]; include_proposal?: boolean; limit?: number }) =>
+    api.get<MyBidsPage>('/bids/my/overview', { params, paramsSerializer: { indexes: null } }),
   updateStatus: (bidId: number, status: string) =>
     api.patch(`/bids/${bidId}/status`, { status }),
 };
 
+export interface UserPage {
+  items: User[];
+  total: number | null;
+  has_more: boolean;
+}
+
+export interface UserFilters {
+  email?: string;
+  name?: string;
+  company?: string;
+  role?: string;
+  is_active?: boolean;
+  sort?: string;
+  skip?: number;
+  limit?: number;
+}
+
 export const usersApi = {
-  list: () => api.get<User[]>('/users'),
+  list: (params?: UserFilters) => api.get<UserPage>('/users', { params }),
   update: (id: number, data: Partial<User>) => api.patch(`/users/${id}`, data),
 };
 
@@ -1,12 +1,13 @@
 import { useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { authApi } from '../api';
+import { authApi, askOrganization, setOrganization } from '../api';
 import { useAuth } from '../AuthContext';
 import styles from './Auth.module.css';
 
 export default function Login() {
   const [email, setEmail] = useState('');
   const [password, setPassword] = useState('');
+  const [org, setOrg] = useState(localStorage.getItem('org') || '');
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const { login } = useAuth();
@@ -17,6 +18,7 @@ export default function Login() {
     setError('');
     setLoading(true);
     try {
+      if (askOrganization) setOrganization(org);
       const { data } = await authApi.login(email, password);
       login(data.access_token, data.user);
       navigate(data.user.role === 'admin' ? '/admin' : '/');
@@ -34,6 +36,16 @@ export default function Login() {
         <h1 className={styles.title}>Вход в систему</h1>
         <form onSubmit={handleSubmit} className={styles.form}>
           {error && <div className={styles.error}>{error}</div>}
+          {askOrganization && (
+            <input
+              type="text"
+              placeholder="Организация"
+              value={org}
+              onChange={(e) => setOrg(e.target.value)}
+              required
+              className={styles.input}
+            />
+          )}
           <input
             type="email"
             placeholder="Email"
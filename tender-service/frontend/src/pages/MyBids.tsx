@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { bidsApi, tendersApi, Bid, Tender } from '../api';
+import { bidsApi, MyBid } from '../api';
 import styles from './MyBids.module.css';
 
 const BID_STATUS_LABELS: Record<string, string> = {
@@ -22,23 +22,30 @@ function formatDate(dateStr: string) {
 }
 
 export default function MyBids() {
-  const [bids, setBids] = useState<Bid[]>([]);
-  const [tenders, setTenders] = useState<Record<number, Tender>>({});
+  const [bids, setBids] = useState<MyBid[]>([]);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [statusFilter, setStatusFilter] = useState('');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const status = statusFilter ? [statusFilter] : undefined;
 
   useEffect(() => {
-    bidsApi.getMy().then(({ data }) => {
-      setBids(data);
-      const ids = [...new Set(data.map((b) => b.tender_id))];
-      Promise.all(ids.map((id) => tendersApi.get(id))).then((responses) => {
-        const map: Record<number, Tender> = {};
-        responses.forEach((r) => {
-          map[r.data.id] = r.data;
-        });
-        setTenders(map);
-      });
+    setLoading(true);
+    bidsApi.getMyOverview({ status, include_proposal: true }).then(({ data }) => {
+      setBids(data.items);
+      setCursor(data.next_cursor);
     }).finally(() => setLoading(false));
-  }, []);
+  }, [statusFilter]);
+
+  const loadMore = () => {
+    if (!cursor) return;
+    setLoadingMore(true);
+    bidsApi.getMyOverview({ status, include_proposal: true, cursor }).then(({ data }) => {
+      setBids((prev) => [...prev, ...data.items]);
+      setCursor(data.next_cursor);
+    }).finally(() => setLoadingMore(false));
+  };
 
   if (loading) {
     return <div className={styles.loading}>Загрузка...</div>;
@@ -47,23 +54,41 @@ export default function MyBids() {
   return (
     <div>
       <h1 className={styles.pageTitle}>Мои заявки</h1>
+      <select
+        className={styles.filter}
+        value={statusFilter}
+        onChange={(e) => setStatusFilter(e.target.value)}
+      >
+        <option value="">Все заявки</option>
+        {Object.entries(BID_STATUS_LABELS).map(([value, label]) => (
+          <option key={value} value={value}>{label}</option>
+        ))}
+      </select>
       <div className={styles.list}>
         {bids.map((bid) => (
           <div key={bid.id} className={styles.card}>
             <div className={styles.cardHeader}>
-              <Link to={`/tenders/${bid.tender_id}`} className={styles.tenderTitle}>
-                {tenders[bid.tender_id]?.title || `Тендер #${bid.tender_id}`}
+              <Link to={`/tenders/${bid.tender.id}`} className={styles.tenderTitle}>
+                {bid.tender.title}
               </Link>
               <span className={`${styles.status} ${styles[`status_${bid.status}`]}`}>
                 {BID_STATUS_LABELS[bid.status] || bid.status}
               </span>
             </div>
             <p className={styles.amount}>{formatAmount(bid.amount)}</p>
+            <p className={styles.meta}>
+              Место {bid.rank} из {bid.bids_count} · бюджет {formatAmount(bid.tender.budget)} · приём до {formatDate(bid.tender.deadline)}
+            </p>
             <p className={styles.proposal}>{bid.proposal}</p>
             <p className={styles.date}>{formatDate(bid.created_at)}</p>
           </div>
         ))}
       </div>
+      {cursor && (
+        <button className={styles.more} onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+        </button>
+      )}
       {bids.length === 0 && (
         <p className={styles.empty}>У вас пока нет заявок</p>
       )}
@@ -1,6 +1,6 @@
 import { useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { authApi } from '../api';
+import { authApi, askOrganization, setOrganization } from '../api';
 import { useAuth } from '../AuthContext';
 import styles from './Auth.module.css';
 
@@ -9,6 +9,7 @@ export default function Register() {
   const [password, setPassword] = useState('');
   const [fullName, setFullName] = useState('');
   const [company, setCompany] = useState('');
+  const [org, setOrg] = useState(localStorage.getItem('org') || '');
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const { login } = useAuth();
@@ -19,6 +20,7 @@ export default function Register() {
     setError('');
     setLoading(true);
     try {
+      if (askOrganization) setOrganization(org);
       await authApi.register({ email, password, full_name: fullName, company: company || undefined });
       const { data } = await authApi.login(email, password);
       login(data.access_token, data.user);
@@ -37,6 +39,16 @@ export default function Register() {
         <h1 className={styles.title}>Регистрация</h1>
         <form onSubmit={handleSubmit} className={styles.form}>
           {error && <div className={styles.error}>{error}</div>}
+          {askOrganization && (
+            <input
+              type="text"
+              placeholder="Организация"
+              value={org}
+              onChange={(e) => setOrg(e.target.value)}
+              required
+              className={styles.input}
+            />
+          )}
           <input
             type="text"
             placeholder="ФИО"
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
-import { tendersApi, bidsApi, Tender } from '../api';
+import { tendersApi, bidsApi, Tender, RankedBid } from '../api';
 import styles from './TenderDetail.module.css';
 
 const STATUS_LABELS: Record<string, string> = {
@@ -26,6 +26,7 @@ function formatAmount(amount: number) {
 export default function TenderDetail() {
   const { id } = useParams<{ id: string }>();
   const [tender, setTender] = useState<Tender | null>(null);
+  const [myBid, setMyBid] = useState<RankedBid | null>(null);
   const [loading, setLoading] = useState(true);
   const [amount, setAmount] = useState('');
   const [proposal, setProposal] = useState('');
@@ -34,8 +35,9 @@ export default function TenderDetail() {
 
   useEffect(() => {
     if (id) {
-      tendersApi.get(Number(id)).then(({ data }) => {
-        setTender(data);
+      tendersApi.detail(Number(id)).then(({ data }) => {
+        setTender(data.tender);
+        setMyBid(data.my_bid || null);
         setLoading(false);
       }).catch(() => setLoading(false));
     }
@@ -55,7 +57,9 @@ export default function TenderDetail() {
       setMessage('Заявка успешно подана!');
       setAmount('');
       setProposal('');
-      setTender({ ...tender, bids_count: (tender.bids_count || 0) + 1 });
+      const { data } = await tendersApi.detail(tender.id);
+      setTender(data.tender);
+      setMyBid(data.my_bid || null);
     } catch (err: unknown) {
       const axiosErr = err as { response?: { data?: { detail?: string } } };
       setMessage(axiosErr.response?.data?.detail || 'Ошибка при подаче заявки');
@@ -83,7 +87,16 @@ export default function TenderDetail() {
         <h2>Описание</h2>
         <p>{tender.description}</p>
       </div>
-      {tender.status === 'bidding' && (
+      {myBid && (
+        <div className={styles.myBid}>
+          <h2>Ваша заявка</h2>
+          {message && <div className={styles.success}>{message}</div>}
+          <p>
+            {formatAmount(myBid.amount)} • Место {myBid.rank} из {tender.bids_count}
+          </p>
+        </div>
+      )}
+      {tender.status === 'bidding' && !myBid && (
         <div className={styles.bidForm}>
           <h2>Подать заявку</h2>
           <form onSubmit={handleSubmitBid}>
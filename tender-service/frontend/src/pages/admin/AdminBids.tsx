@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { bidsApi, tendersApi, Bid, Tender } from '../../api';
+import { bidsApi, tendersApi, RankedBid, Tender } from '../../api';
 import styles from './AdminBids.module.css';
 
 const BID_STATUS_LABELS: Record<string, string> = {
@@ -24,21 +24,30 @@ function formatDate(dateStr: string) {
 export default function AdminBids() {
   const { id } = useParams<{ id: string }>();
   const [tender, setTender] = useState<Tender | null>(null);
-  const [bids, setBids] = useState<Bid[]>([]);
+  const [bids, setBids] = useState<RankedBid[]>([]);
+  const [cursor, setCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (id) {
-      Promise.all([
-        tendersApi.get(Number(id)),
-        bidsApi.getByTender(Number(id)),
-      ]).then(([tRes, bRes]) => {
-        setTender(tRes.data);
-        setBids(bRes.data);
+      tendersApi.detail(Number(id), { include_proposal: true }).then(({ data }) => {
+        setTender(data.tender);
+        setBids(data.bids || []);
+        setCursor(data.next_cursor || null);
       }).finally(() => setLoading(false));
     }
   }, [id]);
 
+  const loadMore = () => {
+    if (!id || !cursor) return;
+    setLoadingMore(true);
+    tendersApi.detail(Number(id), { include_proposal: true, cursor }).then(({ data }) => {
+      setBids((prev) => [...prev, ...(data.bids || [])]);
+      setCursor(data.next_cursor || null);
+    }).finally(() => setLoadingMore(false));
+  };
+
   const handleStatus = async (bidId: number, status: string) => {
     try {
       await bidsApi.updateStatus(bidId, status);
@@ -72,7 +81,9 @@ export default function AdminBids() {
                 {BID_STATUS_LABELS[bid.status] || bid.status}
               </span>
             </div>
-            <p className={styles.amount}>{formatAmount(bid.amount)}</p>
+            <p className={styles.amount}>
+              {formatAmount(bid.amount)} <span className={styles.rank}>#{bid.rank}</span>
+            </p>
             <p className={styles.proposal}>{bid.proposal}</p>
             <p className={styles.date}>{formatDate(bid.created_at)}</p>
             {bid.status === 'pending' && (
@@ -94,6 +105,11 @@ export default function AdminBids() {
           </div>
         ))}
       </div>
+      {cursor && (
+        <button className={styles.more} onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+        </button>
+      )}
       {bids.length === 0 && (
         <p className={styles.empty}>Заявок пока нет</p>
       )}
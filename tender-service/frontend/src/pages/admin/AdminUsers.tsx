@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { usersApi, User } from '../../api';
+import { usersApi, User, UserFilters } from '../../api';
 import styles from './AdminUsers.module.css';
 
 function formatDate(dateStr: string) {
@@ -10,16 +10,40 @@ function formatDate(dateStr: string) {
   });
 }
 
+const PAGE_SIZE = 50;
+
+// Sorting by the searched field lets the server read the matches in index order
+function sortFor(filters: UserFilters) {
+  if (filters.email) return 'email';
+  if (filters.name) return 'full_name';
+  if (filters.company) return 'company';
+  return '-created_at';
+}
+
 export default function AdminUsers() {
   const [users, setUsers] = useState<User[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
+  const [hasMore, setHasMore] = useState(false);
+  const [filters, setFilters] = useState<UserFilters>({});
+  const [skip, setSkip] = useState(0);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    usersApi.list().then(({ data }) => {
-      setUsers(data);
-      setLoading(false);
-    }).catch(() => setLoading(false));
-  }, []);
+    const timer = setTimeout(() => {
+      usersApi.list({ ...filters, sort: sortFor(filters), skip, limit: PAGE_SIZE }).then(({ data }) => {
+        setUsers(data.items);
+        setTotal(data.total);
+        setHasMore(data.has_more);
+        setLoading(false);
+      }).catch(() => setLoading(false));
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [filters, skip]);
+
+  const updateFilter = (changes: UserFilters) => {
+    setFilters((prev) => ({ ...prev, ...changes }));
+    setSkip(0);
+  };
 
   const handleToggleActive = async (user: User) => {
     try {
@@ -39,6 +63,44 @@ export default function AdminUsers() {
   return (
     <div>
       <h1 className={styles.title}>Пользователи</h1>
+      <div className={styles.filters}>
+        <input
+          placeholder="Email"
+          value={filters.email || ''}
+          onChange={(e) => updateFilter({ email: e.target.value || undefined })}
+          className={styles.input}
+        />
+        <input
+          placeholder="ФИО"
+          value={filters.name || ''}
+          onChange={(e) => updateFilter({ name: e.target.value || undefined })}
+          className={styles.input}
+        />
+        <input
+          placeholder="Компания"
+          value={filters.company || ''}
+          onChange={(e) => updateFilter({ company: e.target.value || undefined })}
+          className={styles.input}
+        />
+        <select
+          value={filters.role || ''}
+          onChange={(e) => updateFilter({ role: e.target.value || undefined })}
+          className={styles.input}
+        >
+          <option value="">Все роли</option>
+          <option value="user">Пользователи</option>
+          <option value="admin">Админы</option>
+        </select>
+        <select
+          value={filters.is_active === undefined ? '' : String(filters.is_active)}
+          onChange={(e) => updateFilter({ is_active: e.target.value ? e.target.value === 'true' : undefined })}
+          className={styles.input}
+        >
+          <option value="">Все статусы</option>
+          <option value="true">Активные</option>
+          <option value="false">Заблокированные</option>
+        </select>
+      </div>
       <div className={styles.tableWrap}>
         <table className={styles.table}>
           <thead>
@@ -84,6 +146,18 @@ export default function AdminUsers() {
           </tbody>
         </table>
       </div>
+      <div className={styles.pager}>
+        <button disabled={skip === 0} onClick={() => setSkip(Math.max(0, skip - PAGE_SIZE))} className={styles.pageBtn}>
+          ← Назад
+        </button>
+        <span className={styles.pageInfo}>
+          {users.length > 0 ? `${skip + 1}–${skip + users.length}` : '0'}
+          {total !== null && ` из ${total}`}
+        </span>
+        <button disabled={!hasMore} onClick={() => setSkip(skip + PAGE_SIZE)} className={styles.pageBtn}>
+          Вперёд →
+        </button>
+      </div>
     </div>
   );
 }